@@ -3,9 +3,14 @@ import requests
 from PIL import Image
 from io import BytesIO
 import pandas as pd
-import json
 import time
-from datetime import datetime
+import uuid
+
+from image_cache import THUMBNAIL_WIDTHS, get_image_cache
+from jikan_cache import get_jikan_cache
+from recommender import get_recommender
+from search_pager import ANIME_STATUSES, ANIME_TYPES, get_search_pager
+from watchlist_store import get_watchlist_store
 
 # Set page configuration
 st.set_page_config(
@@ -104,37 +109,47 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Jikan API base URL
-JIKAN_BASE_URL = "https://api.jikan.moe/v4"
+# Shared Jikan client (connection pool + rate limiter for all sessions)
+# behind a persistent stale-while-revalidate response cache
+jikan = get_jikan_cache()
+
+# Paged search over the local catalog snapshot (filled by `python catalog.py`)
+# and Jikan, prefetching the next page in the background
+pager = get_search_pager()
+SEARCH_PAGE_SIZES = [5, 10, 25]
 
-# Initialize session state for watchlist
-if 'watchlist' not in st.session_state:
-    st.session_state.watchlist = {
-        'watching': [],
-        'completed': [],
-        'plan_to_watch': []
-    }
+# Persistent watchlist, one per user, indexed by mal_id and updated row by row.
+# Each browser session gets a random id, kept in the URL (?user=...) so a
+# bookmark or reload brings the same lists back; visitors never share lists.
+if 'user_id' not in st.session_state:
+    st.session_state.user_id = st.query_params.get("user") or uuid.uuid4().hex
+st.query_params["user"] = st.session_state.user_id
+watchlist = get_watchlist_store().for_user(st.session_state.user_id)
+WATCHLIST_PAGE_SIZE = 10
+
+# Cover art is downloaded once and served as local thumbnails
+images = get_image_cache()
 
 # App title
 st.markdown('<h1 class="title">🌸 AniTrack</h1>', unsafe_allow_html=True)
 st.markdown('<h3 style="text-align: center; color: var(--light);">Your Anime Watchlist & Recommender</h3>', unsafe_allow_html=True)
 
 # Function to search anime
-def search_anime(query):
+def search_anime(query, filters, page, page_size):
     try:
-        response = requests.get(f"{JIKAN_BASE_URL}/anime", params={"q": query, "limit": 5})
-        response.raise_for_status()
-        return response.json().get("data", [])
+        return pager.get(query, filters, page, page_size)
     except requests.exceptions.RequestException as e:
         st.error(f"Error fetching data: {str(e)}")
-        return []
+        return [], False
+
+# Function to move between search result pages
+def change_search_page(delta):
+    st.session_state.search_page = max(1, st.session_state.search_page + delta)
 
 # Function to get anime details
 def get_anime_details(anime_id):
     try:
-        response = requests.get(f"{JIKAN_BASE_URL}/anime/{anime_id}/full")
-        response.raise_for_status()
-        return response.json().get("data", {})
+        return jikan.get("details", f"anime/{anime_id}/full").get("data", {})
     except requests.exceptions.RequestException as e:
         st.error(f"Error fetching anime details: {str(e)}")
         return {}
@@ -142,93 +157,150 @@ def get_anime_details(anime_id):
 # Function to get anime recommendations
 def get_anime_recommendations(anime_id):
     try:
-        response = requests.get(f"{JIKAN_BASE_URL}/anime/{anime_id}/recommendations")
-        response.raise_for_status()
-        return response.json().get("data", [])
+        return jikan.get("recommendations", f"anime/{anime_id}/recommendations").get("data", [])
     except requests.exceptions.RequestException as e:
         st.error(f"Error fetching recommendations: {str(e)}")
         return []
 
+# Function to prefetch details and recommendations for search results
+def prefetch_search_results(results):
+    # Only the top of the page, so large pages don't use up the rate limit
+    # needed for the next-page prefetch
+    results = results[:5]
+    # Details first, since "View Details" is the usual next click
+    for anime in results:
+        jikan.prefetch("details", f"anime/{anime['mal_id']}/full")
+    for anime in results:
+        jikan.prefetch("recommendations", f"anime/{anime['mal_id']}/recommendations")
+
+# Function to get cover art, resized for the view it is shown in. Covers
+# not cached yet are downloaded in the background, all of a page's at once,
+# and the browser loads them from the CDN meanwhile
+def cover(url, view=None):
+    width = THUMBNAIL_WIDTHS.get(view)
+    data = images.cached(url, width)
+    if data is None:
+        images.prefetch(url, width)
+        return url
+    return data
+
+# Function to render anime as a 3-column grid of cards
+def render_anime_grid(entries, captions):
+    cols = st.columns(3)
+    for idx, (entry, caption) in enumerate(zip(entries, captions)):
+        with cols[idx % 3]:
+            st.markdown(f'<div class="anime-card">', unsafe_allow_html=True)
+            
+            if entry['images']['jpg']['image_url']:
+                st.image(cover(entry['images']['jpg']['image_url'], "grid"), use_container_width=True)
+            
+            st.markdown(f'<h4 class="anime-title">{entry["title"]}</h4>', unsafe_allow_html=True)
+            st.markdown(f'<p class="anime-info">{caption}</p>', unsafe_allow_html=True)
+            
+            st.markdown('</div>', unsafe_allow_html=True)
+
 # Function to add to watchlist
 def add_to_watchlist(anime_id, list_type):
     anime = next((a for a in st.session_state.search_results if a['mal_id'] == anime_id), None)
     if anime:
-        # Remove from other lists first
-        for lst in st.session_state.watchlist:
-            st.session_state.watchlist[lst] = [a for a in st.session_state.watchlist[lst] if a['mal_id'] != anime_id]
-        
-        # Add to selected list
-        st.session_state.watchlist[list_type].append({
-            'mal_id': anime['mal_id'],
-            'title': anime['title'],
-            'image_url': anime['images']['jpg']['image_url'],
-            'added_on': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
+        # Moves the entry if it is already in another list
+        watchlist.add(anime, list_type)
         st.success(f"Added {anime['title']} to {list_type.replace('_', ' ')} list!")
 
 # Function to remove from watchlist
 def remove_from_watchlist(anime_id, list_type):
-    st.session_state.watchlist[list_type] = [
-        a for a in st.session_state.watchlist[list_type] if a['mal_id'] != anime_id
-    ]
+    watchlist.remove(anime_id, list_type)
     st.success("Removed from your list!")
 
+# Function to render one watchlist tab, one page at a time
+def render_watchlist_tab(list_type, label, key_prefix):
+    total = watchlist.count(list_type)
+    if not total:
+        st.write("No anime in this list yet.")
+        return
+
+    pages = (total + WATCHLIST_PAGE_SIZE - 1) // WATCHLIST_PAGE_SIZE
+    page = 0
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=f"page_{key_prefix}") - 1
+    st.caption(f"{total} anime")
+
+    for anime in watchlist.page(list_type, page, WATCHLIST_PAGE_SIZE):
+        st.image(cover(anime['image_url'], "sidebar"), width=100)
+        st.write(anime['title'])
+        if st.button(f"Remove from {label}", key=f"remove_{key_prefix}_{anime['mal_id']}"):
+            remove_from_watchlist(anime['mal_id'], list_type)
+
 # Sidebar for search and watchlist
 with st.sidebar:
     st.markdown("## 🔍 Search Anime")
     search_query = st.text_input("Enter anime title", key="search_query")
     
+    with st.expander("Filters"):
+        anime_type = st.selectbox("Type", ["Any"] + [t.upper() if len(t) <= 3 else t.title() for t in ANIME_TYPES])
+        status = st.selectbox("Status", ["Any"] + [s.title() for s in ANIME_STATUSES])
+        min_score = st.slider("Minimum score", 0.0, 10.0, 0.0, 0.5)
+        page_size = st.selectbox("Results per page", SEARCH_PAGE_SIZES, index=1)
+    
     if st.button("Search"):
+        st.session_state.search = {
+            'query': search_query,
+            'filters': {
+                'type': None if anime_type == "Any" else anime_type.lower(),
+                'status': None if status == "Any" else status.lower(),
+                'min_score': min_score or None,
+            },
+            'page_size': page_size,
+        }
+        st.session_state.search_page = 1
+    
+    if 'search' in st.session_state:
         with st.spinner("Searching..."):
-            st.session_state.search_results = search_anime(search_query)
+            st.session_state.search_results, st.session_state.search_has_next = search_anime(
+                st.session_state.search['query'],
+                st.session_state.search['filters'],
+                st.session_state.search_page,
+                st.session_state.search['page_size']
+            )
+            prefetch_search_results(st.session_state.search_results)
     
     st.markdown("## 📋 My Watchlist")
     
     watchlist_tab1, watchlist_tab2, watchlist_tab3 = st.tabs(["Watching", "Completed", "Plan to Watch"])
     
     with watchlist_tab1:
-        if st.session_state.watchlist['watching']:
-            for anime in st.session_state.watchlist['watching']:
-                st.image(anime['image_url'], width=100)
-                st.write(anime['title'])
-                if st.button(f"Remove from Watching", key=f"remove_watching_{anime['mal_id']}"):
-                    remove_from_watchlist(anime['mal_id'], 'watching')
-        else:
-            st.write("No anime in this list yet.")
+        render_watchlist_tab('watching', "Watching", "watching")
     
     with watchlist_tab2:
-        if st.session_state.watchlist['completed']:
-            for anime in st.session_state.watchlist['completed']:
-                st.image(anime['image_url'], width=100)
-                st.write(anime['title'])
-                if st.button(f"Remove from Completed", key=f"remove_completed_{anime['mal_id']}"):
-                    remove_from_watchlist(anime['mal_id'], 'completed')
-        else:
-            st.write("No anime in this list yet.")
+        render_watchlist_tab('completed', "Completed", "completed")
     
     with watchlist_tab3:
-        if st.session_state.watchlist['plan_to_watch']:
-            for anime in st.session_state.watchlist['plan_to_watch']:
-                st.image(anime['image_url'], width=100)
-                st.write(anime['title'])
-                if st.button(f"Remove from Plan to Watch", key=f"remove_plan_{anime['mal_id']}"):
-                    remove_from_watchlist(anime['mal_id'], 'plan_to_watch')
-        else:
-            st.write("No anime in this list yet.")
+        render_watchlist_tab('plan_to_watch', "Plan to Watch", "plan")
+
+    cache_stats = jikan.stats()
+    st.caption(
+        f"API cache: {cache_stats['entries']} entries, {cache_stats['size_kb']} KB, "
+        f"hit ratio {cache_stats['hit_ratio']:.0%}"
+    )
+    image_stats = images.stats()
+    st.caption(
+        f"Image cache: {image_stats['memory_items']} thumbnails in memory ({image_stats['memory_kb']} KB), "
+        f"{image_stats['saved_kb']} KB saved"
+    )
 
 # Main content area
 tab1, tab2, tab3 = st.tabs(["🔍 Search Results", "📃 Anime Details", "🧠 Recommendations"])
 
 with tab1:
     if 'search_results' in st.session_state and st.session_state.search_results:
-        st.markdown(f"<h3>Search Results for '{search_query}'</h3>", unsafe_allow_html=True)
+        st.markdown(f"<h3>Search Results for '{st.session_state.search['query']}'</h3>", unsafe_allow_html=True)
         
         for idx, anime in enumerate(st.session_state.search_results):
             col1, col2 = st.columns([1, 3])
             
             with col1:
                 if anime['images']['jpg']['image_url']:
-                    st.image(anime['images']['jpg']['image_url'], use_container_width=True)
+                    st.image(cover(anime['images']['jpg']['image_url'], "card"), use_container_width=True)
             
             with col2:
                 st.markdown(f'<div class="anime-card">', unsafe_allow_html=True)
@@ -271,6 +343,20 @@ with tab1:
                         add_to_watchlist(anime['mal_id'], 'plan_to_watch')
                 
                 st.markdown('</div>', unsafe_allow_html=True)
+        
+        # Page navigation; the next page is usually already prefetched
+        col_prev, col_page, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            st.button("← Previous", key="search_prev", disabled=st.session_state.search_page <= 1,
+                      on_click=change_search_page, args=(-1,))
+        with col_page:
+            st.markdown(f'<p class="anime-info" style="text-align: center;">Page {st.session_state.search_page}</p>', unsafe_allow_html=True)
+        with col_next:
+            st.button("Next →", key="search_next", disabled=not st.session_state.search_has_next,
+                      on_click=change_search_page, args=(1,))
+    elif 'search_results' in st.session_state and st.session_state.search_page > 1:
+        st.warning("No more results.")
+        st.button("← Previous", key="search_back", on_click=change_search_page, args=(-1,))
     elif 'search_results' in st.session_state:
         st.warning("No results found. Try a different search.")
     else:
@@ -286,7 +372,7 @@ with tab2:
             
             with col1:
                 if anime_details['images']['jpg']['image_url']:
-                    st.image(anime_details['images']['jpg']['image_url'], use_container_width=True)
+                    st.image(cover(anime_details['images']['jpg']['image_url']), use_container_width=True)
                 
                 # Trailer
                 if anime_details.get('trailer') and anime_details['trailer'].get('embed_url'):
@@ -358,47 +444,42 @@ with tab2:
         st.info("Select an anime from search results to view details.")
 
 with tab3:
+    # Content-based picks for the whole watchlist, from the local catalog
+    watched = watchlist.lists()
+    if watched:
+        recommender = get_recommender()
+        if recommender.records:
+            # Titles missing from the snapshot are encoded from their details
+            # once cached; uncached ones are fetched in the background so
+            # this never waits on the rate limit
+            extra = []
+            for mal_id in watched:
+                if mal_id in recommender.row_of:
+                    continue
+                details = jikan.peek(f"anime/{mal_id}/full")
+                if details and details.get("data"):
+                    extra.append(details["data"])
+                else:
+                    jikan.prefetch("details", f"anime/{mal_id}/full")
+            picks = recommender.recommend(watched, k=6, extra_records=extra)
+            if picks:
+                st.markdown('<h3>Picked for your watchlist</h3>', unsafe_allow_html=True)
+                render_anime_grid(picks, [f"{pick['similarity']:.0%} match" for pick in picks])
+
     if 'selected_anime_id' in st.session_state:
         with st.spinner("Loading recommendations..."):
             recommendations = get_anime_recommendations(st.session_state.selected_anime_id)
         
         if recommendations:
-            st.markdown(f'<h3>Recommendations based on {st.session_state.search_results[0]["title"]}</h3>', unsafe_allow_html=True)
+            selected = get_anime_details(st.session_state.selected_anime_id)
+            st.markdown(f'<h3>Recommendations based on {selected.get("title", "this anime")}</h3>', unsafe_allow_html=True)
             
-            # Display as grid
-            cols = st.columns(3)
-            for idx, rec in enumerate(recommendations[:6]):  # Show top 6 recommendations
-                entry = rec['entry']
-                with cols[idx % 3]:
-                    st.markdown(f'<div class="anime-card">', unsafe_allow_html=True)
-                    
-                    if entry['images']['jpg']['image_url']:
-                        st.image(entry['images']['jpg']['image_url'], use_container_width=True)
-                    
-                    st.markdown(f'<h4 class="anime-title">{entry["title"]}</h4>', unsafe_allow_html=True)
-                    
-                    # Count of recommendations
-                    st.markdown(f'<p class="anime-info">{rec["votes"]} users recommended this</p>', unsafe_allow_html=True)
-                    
-                    st.markdown('</div>', unsafe_allow_html=True)
+            # Show top 6 recommendations
+            render_anime_grid(
+                [rec['entry'] for rec in recommendations[:6]],
+                [f"{rec['votes']} users recommended this" for rec in recommendations[:6]]
+            )
         else:
             st.warning("No recommendations found for this anime.")
     else:
         st.info("Select an anime from search results to get recommendations.")
-
-# Save watchlist to JSON file (optional)
-def save_watchlist():
-    with open('anime_watchlist.json', 'w') as f:
-        json.dump(st.session_state.watchlist, f)
-
-# Load watchlist from JSON file (optional)
-def load_watchlist():
-    try:
-        with open('anime_watchlist.json', 'r') as f:
-            st.session_state.watchlist = json.load(f)
-    except FileNotFoundError:
-        pass
-
-# Uncomment to enable JSON watchlist persistence
-# load_watchlist()
-# st.session_state.save_watchlist = save_watchlist
\ No newline at end of file
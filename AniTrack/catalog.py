@@ -0,0 +1,293 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import logging
+
+from jikan_client import get_jikan_client
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS anime (
+    mal_id INTEGER PRIMARY KEY,
+    names TEXT NOT NULL,
+    popularity INTEGER,
+    record TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS title_grams (
+    gram TEXT NOT NULL,
+    mal_id INTEGER NOT NULL,
+    PRIMARY KEY (gram, mal_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS title_grams_anime ON title_grams (mal_id);
+CREATE TABLE IF NOT EXISTS crawl_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Fields of a Jikan anime object the app actually renders or ranks on
+RECORD_FIELDS = (
+    "mal_id", "title", "title_english", "title_japanese", "title_synonyms", "type", "episodes",
+    "status", "score", "scored_by", "rank", "popularity", "members", "year",
+)
+TAG_FIELDS = ("genres", "themes", "demographics", "studios")
+SYNOPSIS_CHARS = 300
+# Candidates taken from the gram index before exact re-ranking
+CANDIDATES = 200
+# Queries up to this length are also compared by edit distance, where a
+# single typo destroys too many of their few trigrams
+SHORT_QUERY_CHARS = 12
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return " ".join(re.findall(r"\w+", text))
+
+
+def trigrams(text):
+    # Words are padded like pg_trgm so short words and word starts still
+    # produce grams; works the same for kana/kanji as for latin titles
+    grams = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(query, name):
+    # Mean of the Dice coefficient and the share of query grams found in the
+    # name, so partial queries ("shingeki", "進撃") still match long titles
+    if not query or not name:
+        return 0.0
+    shared = len(query & name)
+    return (2 * shared / (len(query) + len(name)) + shared / len(query)) / 2
+
+
+def edit_distance(a, b):
+    # Optimal string alignment distance: insertions, deletions, substitutions
+    # and transpositions of adjacent characters each cost 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def edit_similarity(query, name):
+    # Compares the normalised query with the same number of leading words
+    # of the name, so "naurto" matches "Naruto: Shippuuden" as well as "Naruto".
+    # Only near misses count: one edit per four characters, at least one.
+    words = normalize(name).split()[:len(query.split())]
+    prefix = " ".join(words)
+    allowed = max(1, len(query) // 4)
+    if not query or not prefix or abs(len(query) - len(prefix)) > allowed:
+        return 0.0
+    distance = edit_distance(query, prefix)
+    if distance > allowed:
+        return 0.0
+    return 1 - distance / max(len(query), len(prefix))
+
+
+def compact_record(anime):
+    record = {field: anime.get(field) for field in RECORD_FIELDS}
+    record["images"] = {"jpg": {"image_url": ((anime.get("images") or {}).get("jpg") or {}).get("image_url")}}
+    for field in TAG_FIELDS:
+        record[field] = [{"mal_id": tag["mal_id"], "name": tag["name"]} for tag in anime.get(field) or []]
+    synopsis = anime.get("synopsis") or "No synopsis available."
+    record["synopsis"] = synopsis[:SYNOPSIS_CHARS]
+    return record
+
+
+def title_names(anime):
+    names = [anime.get("title"), anime.get("title_english"), anime.get("title_japanese")]
+    names += anime.get("title_synonyms") or []
+    names += [title.get("title") for title in anime.get("titles") or []]
+    seen = []
+    for name in names:
+        if name and name not in seen:
+            seen.append(name)
+    return seen
+
+
+class AnimeCatalog:
+    # Local snapshot of Jikan's anime listing with a trigram index over every
+    # title variant (romaji, English, Japanese, synonyms). The crawl commits
+    # page by page together with its position, so it can be stopped and
+    # resumed at any point.
+    def __init__(self, path="anime_catalog.db", client=None):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.client = client or get_jikan_client()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def _state(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM crawl_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_state(self, key, value):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO crawl_state (key, value) VALUES (?, ?)", (key, json.dumps(value))
+        )
+
+    def add(self, entries):
+        with self._lock, self._conn:
+            self._add(entries)
+
+    def _add(self, entries):
+        for anime in entries:
+            names = title_names(anime)
+            self._conn.execute("DELETE FROM title_grams WHERE mal_id = ?", (anime["mal_id"],))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO anime (mal_id, names, popularity, record) VALUES (?, ?, ?, ?)",
+                (anime["mal_id"], json.dumps(names, ensure_ascii=False), anime.get("popularity"),
+                 json.dumps(compact_record(anime), ensure_ascii=False))
+            )
+            grams = set()
+            for name in names:
+                grams |= trigrams(name)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO title_grams (gram, mal_id) VALUES (?, ?)",
+                [(gram, anime["mal_id"]) for gram in grams]
+            )
+
+    def crawl(self, max_pages=None, restart=False, progress_callback=None):
+        # Walks /anime ordered by mal_id so pages stay stable while the crawl
+        # runs; titles added to MAL later land on the last pages
+        with self._lock, self._conn:
+            if restart:
+                self._set_state("next_page", 1)
+            page = self._state("next_page", 1)
+
+        fetched = 0
+        while max_pages is None or fetched < max_pages:
+            body = self.client.get("anime", params={"page": page, "limit": 25, "order_by": "mal_id", "sort": "asc"})
+            pagination = body.get("pagination", {})
+            with self._lock, self._conn:
+                self._add(body.get("data", []))
+                has_next = pagination.get("has_next_page", False)
+                # Once complete, the next run re-reads the last page for new titles
+                self._set_state("next_page", page + 1 if has_next else page)
+                self._set_state("last_page", pagination.get("last_visible_page", page))
+                if not has_next:
+                    self._set_state("completed", time.time())
+            fetched += 1
+            if progress_callback is not None:
+                progress_callback(page, pagination.get("last_visible_page", page))
+            if not has_next:
+                break
+            page += 1
+        return fetched
+
+    def search(self, query, limit=5, min_similarity=0.5):
+        grams = trigrams(query)
+        if not grams:
+            return []
+        placeholders = ",".join("?" * len(grams))
+        with self._lock:
+            # Popular titles win ties so a short query's real match is not
+            # crowded out by obscure titles sharing the same few grams
+            candidates = self._conn.execute(
+                f"SELECT g.mal_id, COUNT(*) AS shared FROM title_grams g JOIN anime a ON a.mal_id = g.mal_id "
+                f"WHERE g.gram IN ({placeholders}) "
+                "GROUP BY g.mal_id ORDER BY shared DESC, COALESCE(a.popularity, 1e9) LIMIT ?",
+                (*grams, CANDIDATES)
+            ).fetchall()
+            if not candidates:
+                return []
+            ids = [mal_id for mal_id, _ in candidates]
+            rows = self._conn.execute(
+                f"SELECT mal_id, names, popularity, record FROM anime WHERE mal_id IN ({','.join('?' * len(ids))})",
+                ids
+            ).fetchall()
+
+        normalized = normalize(query)
+        short = len(normalized) <= SHORT_QUERY_CHARS
+        scored = []
+        for mal_id, names, popularity, record in rows:
+            names = json.loads(names)
+            best = max(similarity(grams, trigrams(name)) for name in names)
+            if short:
+                best = max(best, max(edit_similarity(normalized, name) for name in names))
+            if best >= min_similarity:
+                # Popularity is a rank (1 = most popular); breaks ties between
+                # equally close titles
+                scored.append((-best, popularity or float("inf"), record))
+        scored.sort(key=lambda item: item[:2])
+        return [json.loads(record) for _, _, record in scored[:limit]]
+
+    def records(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT record FROM anime ORDER BY mal_id").fetchall()
+        return [json.loads(record) for record, in rows]
+
+    def stats(self):
+        with self._lock:
+            titles = self._conn.execute("SELECT COUNT(*) FROM anime").fetchone()[0]
+            next_page = self._state("next_page", 1)
+            last_page = self._state("last_page")
+            completed = self._state("completed")
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {
+            "titles": titles,
+            "next_page": next_page,
+            "last_page": last_page,
+            "completed": completed,
+            "size_mb": round(size / (1024 * 1024), 2),
+        }
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_anime_catalog():
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = AnimeCatalog(os.environ.get("ANITRACK_CATALOG_PATH", "anime_catalog.db"))
+        return _catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl Jikan's anime listing into the local AniTrack catalog")
+    parser.add_argument("--max-pages", type=int, default=None, help="Stop after this many pages (resume later)")
+    parser.add_argument("--restart", action="store_true", help="Start again from the first page")
+    parser.add_argument("--search", default=None, help="Search the local catalog instead of crawling")
+    args = parser.parse_args()
+
+    catalog = get_anime_catalog()
+    if args.search:
+        start = time.perf_counter()
+        results = catalog.search(args.search, limit=10)
+        elapsed = (time.perf_counter() - start) * 1000
+        for anime in results:
+            print(f"{anime['mal_id']:>6}  {anime['title']}")
+        print(f"{len(results)} results in {elapsed:.1f} ms")
+        return
+
+    def report(page, last_page):
+        print(f"Page {page}/{last_page}", flush=True)
+
+    try:
+        catalog.crawl(max_pages=args.max_pages, restart=args.restart, progress_callback=report)
+    except KeyboardInterrupt:
+        print("Interrupted; run again to resume")
+    print(json.dumps(catalog.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+import hashlib
+import os
+import threading
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from PIL import Image
+
+
+# Display widths in pixels for each place a cover is shown
+THUMBNAIL_WIDTHS = {
+    "sidebar": 100,
+    "card": 225,
+    "grid": 225,
+}
+
+
+class ImageCache:
+    # Downloads each cover once, keeps the original on disk and serves resized
+    # JPEG thumbnails from a byte-bounded in-memory LRU, falling back to disk.
+    # The disk directory is trimmed by file mtime like the transcript cache,
+    # once a running size total goes over the budget. Missing covers can be
+    # downloaded concurrently in the background with prefetch().
+    def __init__(self, cache_dir="image_cache", memory_bytes=32 * 1024 * 1024, disk_bytes=256 * 1024 * 1024,
+                 timeout=(3.05, 10), quality=85, prefetch_workers=8):
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.timeout = timeout
+        self.quality = quality
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(8, prefetch_workers))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._inflight = {}
+        self._prefetcher = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="image-prefetch")
+        self._prefetching = set()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.downloads = 0
+        self.bytes_downloaded = 0
+        self.bytes_served = 0
+        # What the same requests would have cost fetching full-size covers
+        self.bytes_full_size = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._disk_size = sum(size for _, size, _ in self._entries())
+
+    @staticmethod
+    def _name(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _path(self, url, width=None):
+        suffix = f"_{width}" if width else ""
+        return os.path.join(self.cache_dir, f"{self._name(url)}{suffix}.jpg")
+
+    def _remember(self, key, data):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = data
+            self._memory_size += len(data)
+            while self._memory_size > self.memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    def _read(self, path):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path, None)
+            return data
+        except OSError:
+            return None
+
+    def _write(self, path, data):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._disk_size += len(data) - previous
+        except OSError as e:
+            self.logger.warning("Failed to cache image %s: %s", path, str(e))
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _original(self, url):
+        # Single flight so concurrent sessions asking for the same cover
+        # download it once
+        path = self._path(url)
+        data = self._read(path)
+        if data is not None:
+            return data
+
+        with self._lock:
+            future = self._inflight.get(url)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[url] = future
+        if not owner:
+            return future.result()
+
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.content
+            self._write(path, data)
+            with self._lock:
+                self.downloads += 1
+                self.bytes_downloaded += len(data)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[url]
+
+    def _resize(self, data, width):
+        image = Image.open(BytesIO(data))
+        if image.width <= width:
+            return data
+        height = max(1, round(image.height * width / image.width))
+        thumbnail = image.convert("RGB").resize((width, height), Image.LANCZOS)
+        buffer = BytesIO()
+        thumbnail.save(buffer, format="JPEG", quality=self.quality, optimize=True)
+        return buffer.getvalue()
+
+    def _lookup(self, url, width):
+        key = (url, width)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return data
+        data = self._read(self._path(url, width))
+        if data is not None:
+            with self._lock:
+                self.disk_hits += 1
+            self._remember(key, data)
+        return data
+
+    def _fetch(self, url, width):
+        original = self._original(url)
+        data = self._resize(original, width) if width else original
+        if data is not original:
+            self._write(self._path(url, width), data)
+        self._evict()
+        self._remember((url, width), data)
+        return data
+
+    def _served(self, url, data):
+        full_size = self._full_size(url, data)
+        with self._lock:
+            self.bytes_served += len(data)
+            self.bytes_full_size += full_size
+
+    def cached(self, url, width=None):
+        # Like get(), but returns None instead of downloading a missing cover
+        data = self._lookup(url, width)
+        if data is not None:
+            self._served(url, data)
+        return data
+
+    def get(self, url, width=None):
+        # Returns JPEG bytes for st.image; width=None serves the original
+        data = self._lookup(url, width)
+        if data is None:
+            data = self._fetch(url, width)
+        self._served(url, data)
+        return data
+
+    def prefetch(self, url, width=None):
+        # Downloads and resizes a cover in the background, so a page's
+        # missing covers are fetched concurrently
+        key = (url, width)
+        with self._lock:
+            if key in self._prefetching:
+                return None
+            self._prefetching.add(key)
+        return self._prefetcher.submit(self._prefetch_one, url, width)
+
+    def _prefetch_one(self, url, width):
+        try:
+            if not os.path.exists(self._path(url, width)):
+                self._fetch(url, width)
+        except Exception as e:
+            self.logger.info("Prefetch of %s failed: %s", url, str(e))
+        finally:
+            with self._lock:
+                self._prefetching.discard((url, width))
+
+    def _full_size(self, url, data):
+        try:
+            return os.path.getsize(self._path(url))
+        except OSError:
+            return len(data)
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".jpg"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        return entries
+
+    def _evict(self):
+        # The directory is only listed once the running total is over the
+        # budget, and then trimmed to 90% of it so that doesn't happen again
+        # on the very next download
+        with self._lock:
+            if self._disk_size <= self.disk_bytes:
+                return
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in entries:
+                if total <= self.disk_bytes * 0.9:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    total -= size
+                except OSError:
+                    pass
+            self._disk_size = total
+
+    def stats(self):
+        with self._lock:
+            # Without the cache every request would fetch the full-size cover
+            saved = self.bytes_full_size - self.bytes_downloaded
+            return {
+                "memory_items": len(self._memory),
+                "memory_kb": round(self._memory_size / 1024, 1),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "downloads": self.downloads,
+                "downloaded_kb": round(self.bytes_downloaded / 1024, 1),
+                "served_kb": round(self.bytes_served / 1024, 1),
+                "saved_kb": round(max(0, saved) / 1024, 1),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ImageCache(
+                cache_dir=os.environ.get("ANITRACK_IMAGE_DIR", "image_cache"),
+                memory_bytes=int(os.environ.get("ANITRACK_IMAGE_MEMORY_MB", "32")) * 1024 * 1024,
+                disk_bytes=int(os.environ.get("ANITRACK_IMAGE_CACHE_MB", "256")) * 1024 * 1024
+            )
+        return _cache
@@ -0,0 +1,192 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+
+from jikan_client import get_jikan_client
+
+
+# Seconds before an entry counts as stale, per endpoint
+DEFAULT_TTLS = {
+    "search": 60 * 60,
+    "details": 24 * 60 * 60,
+    "recommendations": 24 * 60 * 60,
+}
+# Stale entries older than this are not served at all
+MAX_STALE_SECONDS = 7 * 24 * 60 * 60
+
+
+class JikanCache:
+    # Persistent response cache in front of the Jikan client. Fresh entries
+    # are returned directly; stale ones are returned immediately while a
+    # background thread refreshes them (stale-while-revalidate).
+    def __init__(self, client=None, path="jikan_cache.db", ttls=None, refresh_workers=2, prefetch_workers=3):
+        self.logger = logging.getLogger(__name__)
+        self.client = client or get_jikan_client()
+        self.path = path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, endpoint TEXT NOT NULL, body TEXT NOT NULL, size INTEGER NOT NULL, "
+            "fetched REAL NOT NULL)"
+        )
+        self._conn.execute("DELETE FROM responses WHERE fetched < ?", (time.time() - MAX_STALE_SECONDS,))
+        self._conn.commit()
+        # Running totals for stats(), so it never scans the table
+        self._entries, self._size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="jikan-refresh")
+        self._refreshing = set()
+        self._prefetcher = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="jikan-prefetch")
+        self._prefetching = set()
+        self._inflight = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.prefetches = 0
+
+    @staticmethod
+    def make_key(path, params=None):
+        return f"{path}?{json.dumps(params or {}, sort_keys=True)}"
+
+    def _read(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT body, fetched FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None, None
+        return json.loads(row[0]), row[1]
+
+    def _write(self, key, endpoint, body):
+        text = json.dumps(body)
+        with self._lock, self._conn:
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, body, size, fetched) VALUES (?, ?, ?, ?, ?)",
+                (key, endpoint, text, len(text), time.time())
+            )
+            if previous is None:
+                self._entries += 1
+            else:
+                self._size -= previous[0]
+            self._size += len(text)
+
+    def _fetch(self, key, endpoint, path, params):
+        # Single flight: a caller asking for a key that is already being
+        # fetched (e.g. by the prefetcher) waits for that request instead of
+        # sending a second one
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        if not owner:
+            return future.result()
+
+        try:
+            body = self.client.get(path, params=params)
+            self._write(key, endpoint, body)
+            future.set_result(body)
+            return body
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _refresh(self, key, endpoint, path, params):
+        try:
+            self._fetch(key, endpoint, path, params)
+            with self._lock:
+                self.refreshes += 1
+        except Exception as e:
+            self.logger.warning("Background refresh of %s failed: %s", key, str(e))
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, endpoint, path, params=None):
+        key = self.make_key(path, params)
+        body, fetched = self._read(key)
+        if body is None:
+            with self._lock:
+                self.misses += 1
+            return self._fetch(key, endpoint, path, params)
+
+        if time.time() - fetched <= self.ttls.get(endpoint, 0):
+            with self._lock:
+                self.hits += 1
+            return body
+
+        with self._lock:
+            self.stale_hits += 1
+            schedule = key not in self._refreshing
+            self._refreshing.add(key)
+        if schedule:
+            self._refresher.submit(self._refresh, key, endpoint, path, params)
+        return body
+
+    def peek(self, path, params=None):
+        # Cached body (fresh or stale) without ever touching the network
+        body, _ = self._read(self.make_key(path, params))
+        return body
+
+    def prefetch(self, endpoint, path, params=None):
+        # Warms the cache in the background; requests still go through the
+        # shared rate limiter, so prefetching never exceeds Jikan's limits
+        key = self.make_key(path, params)
+        body, fetched = self._read(key)
+        if body is not None and time.time() - fetched <= self.ttls.get(endpoint, 0):
+            return None
+        with self._lock:
+            # Queued tasks are not in flight yet, so both are checked
+            if key in self._inflight or key in self._prefetching:
+                return None
+            self._prefetching.add(key)
+            self.prefetches += 1
+        return self._prefetcher.submit(self._prefetch_one, key, endpoint, path, params)
+
+    def _prefetch_one(self, key, endpoint, path, params):
+        try:
+            return self.get(endpoint, path, params)
+        except Exception as e:
+            self.logger.info("Prefetch of %s failed: %s", path, str(e))
+            return None
+        finally:
+            with self._lock:
+                self._prefetching.discard(key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "entries": self._entries,
+                "size_kb": round(self._size / 1024, 1),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "prefetches": self.prefetches,
+                "hit_ratio": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_jikan_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = JikanCache(path=os.environ.get("ANITRACK_CACHE_PATH", "jikan_cache.db"))
+        return _cache
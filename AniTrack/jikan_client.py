@@ -0,0 +1,142 @@
+import email.utils
+import os
+import threading
+import time
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+JIKAN_BASE_URL = os.environ.get("JIKAN_BASE_URL", "https://api.jikan.moe/v4")
+
+
+class TokenBucket:
+    # Allows `capacity` calls in a burst, refilled at `rate` tokens per second
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        # Used after a 429 so every caller backs off, not just the one that hit it
+        with self._lock:
+            self._refill()
+            # Leaves the next token available exactly `seconds` from now
+            self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class RateLimiter:
+    # Jikan allows roughly 3 requests per second and 60 per minute
+    def __init__(self, per_second=3, per_minute=60):
+        self.buckets = [
+            TokenBucket(per_second, per_second),
+            TokenBucket(per_minute / 60, per_minute),
+        ]
+
+    def acquire(self):
+        for bucket in self.buckets:
+            bucket.acquire()
+
+    def pause(self, seconds):
+        for bucket in self.buckets:
+            bucket.pause(seconds)
+
+
+def retry_after_seconds(response, default):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+        return max(0.0, when.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class JikanClient:
+    # Keep-alive session plus a shared rate limiter. 429 and 5xx responses are
+    # retried with Retry-After or exponential backoff; anything else raises
+    # the usual requests exceptions.
+    def __init__(self, base_url=JIKAN_BASE_URL, limiter=None, timeout=(3.05, 10), max_retries=3, pool_size=10):
+        self.logger = logging.getLogger(__name__)
+        self.base_url = base_url.rstrip("/")
+        self.limiter = limiter or RateLimiter()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.requests_sent = 0
+        self.throttled = 0
+
+    def get(self, path, params=None):
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        backoff = 1.0
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            self.requests_sent += 1
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(backoff)
+                backoff *= 2
+                continue
+
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == self.max_retries:
+                    response.raise_for_status()
+                wait = retry_after_seconds(response, backoff)
+                self.logger.info("Jikan returned %s, retrying in %.1fs", response.status_code, wait)
+                if response.status_code == 429:
+                    # The limiter makes the next acquire() wait out Retry-After
+                    self.throttled += 1
+                    self.limiter.pause(wait)
+                else:
+                    time.sleep(wait)
+                backoff *= 2
+                continue
+
+            response.raise_for_status()
+            return response.json()
+
+    def stats(self):
+        return {"requests": self.requests_sent, "throttled": self.throttled}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_jikan_client():
+    # One client per process so every Streamlit session shares the connection
+    # pool and the rate limit
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = JikanClient()
+        return _client
@@ -0,0 +1,149 @@
+from collections import Counter
+import threading
+import time
+import logging
+
+import numpy as np
+
+from catalog import TAG_FIELDS, get_anime_catalog
+
+
+# Relative weight of each feature group in the similarity
+FEATURE_WEIGHTS = {
+    "genres": 1.0,
+    "themes": 0.8,
+    "demographics": 0.5,
+    "studios": 0.6,
+    "score": 0.5,
+}
+# Studios outside the most frequent ones carry little signal and would make
+# the dense matrix much wider
+MAX_STUDIOS = 300
+# How much each list counts towards the taste profile
+LIST_WEIGHTS = {"watching": 1.0, "completed": 1.0, "plan_to_watch": 0.5}
+
+
+class ContentRecommender:
+    # Encodes every catalog title as a row of weighted one-hot tag features
+    # plus its score, L2-normalised, in one float32 matrix. Recommending for a
+    # watchlist is then a single matrix-vector product against the mean of
+    # the watched rows.
+    def __init__(self, records):
+        self.logger = logging.getLogger(__name__)
+        start = time.perf_counter()
+        self.records = records
+        self.row_of = {record["mal_id"]: row for row, record in enumerate(records)}
+        self.columns = self._build_columns(records)
+        self.matrix = np.stack([self.encode(record) for record in records]) if records else np.zeros(
+            (0, len(self.columns) + 1), dtype=np.float32
+        )
+        self.build_s = time.perf_counter() - start
+
+    @staticmethod
+    def _build_columns(records):
+        studios = Counter(tag["mal_id"] for record in records for tag in record.get("studios") or [])
+        keep_studios = {mal_id for mal_id, _ in studios.most_common(MAX_STUDIOS)}
+        keys = set()
+        for record in records:
+            for field in TAG_FIELDS:
+                for tag in record.get(field) or []:
+                    if field != "studios" or tag["mal_id"] in keep_studios:
+                        keys.add((field, tag["mal_id"]))
+        return {key: column for column, key in enumerate(sorted(keys))}
+
+    def encode(self, record):
+        # Last column holds the score; unknown tags are ignored
+        vector = np.zeros(len(self.columns) + 1, dtype=np.float32)
+        for field in TAG_FIELDS:
+            tags = [self.columns.get((field, tag["mal_id"])) for tag in record.get(field) or []]
+            tags = [column for column in tags if column is not None]
+            if tags:
+                # Spread the group weight so titles with many tags don't dominate
+                vector[tags] = FEATURE_WEIGHTS[field] / np.sqrt(len(tags))
+        vector[-1] = FEATURE_WEIGHTS["score"] * (record.get("score") or 0) / 10
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def recommend(self, watchlist, k=12, extra_records=None):
+        # watchlist maps mal_id -> list type; extra_records supplies titles
+        # that are not in the catalog (e.g. fetched detail records)
+        extra = {record["mal_id"]: record for record in extra_records or []}
+        vectors, weights = [], []
+        for mal_id, list_type in watchlist.items():
+            weight = LIST_WEIGHTS.get(list_type, 1.0)
+            row = self.row_of.get(mal_id)
+            if row is not None:
+                vectors.append(self.matrix[row])
+            elif mal_id in extra:
+                vectors.append(self.encode(extra[mal_id]))
+            else:
+                continue
+            weights.append(weight)
+        if not vectors or not len(self.records):
+            return []
+
+        profile = np.average(np.stack(vectors), axis=0, weights=weights).astype(np.float32)
+        similarity = self.matrix @ profile
+        seen = [self.row_of[mal_id] for mal_id in watchlist if mal_id in self.row_of]
+        similarity[seen] = -np.inf
+
+        k = min(k, len(similarity) - len(seen))
+        if k <= 0:
+            return []
+        top = np.argpartition(-similarity, k - 1)[:k]
+        top = top[np.argsort(-similarity[top])]
+        return [
+            {**self.records[row], "similarity": round(float(similarity[row]), 3)}
+            for row in top if np.isfinite(similarity[row])
+        ]
+
+
+# While the catalog is still growing, rebuild at most this often
+REBUILD_INTERVAL_S = 10 * 60
+
+_recommender = None
+_recommender_version = None
+_recommender_built = 0.0
+_rebuilding = False
+_recommender_lock = threading.Lock()
+
+
+def _catalog_version(stats):
+    # Changes whenever titles are added or a crawl completes
+    return stats["titles"], stats["completed"]
+
+
+def _rebuild(catalog, version):
+    global _recommender, _recommender_version, _recommender_built, _rebuilding
+    try:
+        recommender = ContentRecommender(catalog.records())
+        with _recommender_lock:
+            _recommender, _recommender_version = recommender, version
+            _recommender_built = time.monotonic()
+    except Exception as e:
+        logging.getLogger(__name__).warning("Rebuilding the recommender failed: %s", str(e))
+    finally:
+        with _recommender_lock:
+            _rebuilding = False
+
+
+def get_recommender():
+    # The first build is synchronous. Later ones run on a background thread
+    # while the previous matrix keeps serving: right away once a crawl
+    # completes, otherwise at most every REBUILD_INTERVAL_S while it grows.
+    global _recommender, _recommender_version, _recommender_built, _rebuilding
+    catalog = get_anime_catalog()
+    stats = catalog.stats()
+    version = _catalog_version(stats)
+    with _recommender_lock:
+        if _recommender is None:
+            _recommender = ContentRecommender(catalog.records())
+            _recommender_version, _recommender_built = version, time.monotonic()
+            return _recommender
+        stale = version != _recommender_version
+        completed = stats["completed"] != _recommender_version[1]
+        due = time.monotonic() - _recommender_built >= REBUILD_INTERVAL_S
+        if stale and (completed or due) and not _rebuilding:
+            _rebuilding = True
+            threading.Thread(target=_rebuild, args=(catalog, version), name="recommender-rebuild", daemon=True).start()
+        return _recommender
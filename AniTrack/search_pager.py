@@ -0,0 +1,178 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import json
+import threading
+import time
+import logging
+
+from catalog import get_anime_catalog
+from jikan_cache import get_jikan_cache
+
+
+# Filter values as Jikan's /anime search expects them, with the status
+# strings the same titles carry in the local catalog
+ANIME_TYPES = ("tv", "movie", "ova", "special", "ona", "music")
+ANIME_STATUSES = {
+    "airing": "Currently Airing",
+    "complete": "Finished Airing",
+    "upcoming": "Not yet aired",
+}
+# Jikan caps the page size at 25
+MAX_PAGE_SIZE = 25
+# Local matches considered when paging through catalog results
+LOCAL_RESULTS = 200
+
+
+def search_params(query, filters, page, page_size):
+    params = {"q": query, "page": page, "limit": min(page_size, MAX_PAGE_SIZE)}
+    if filters.get("type"):
+        params["type"] = filters["type"]
+    if filters.get("status"):
+        params["status"] = filters["status"]
+    if filters.get("min_score"):
+        params["min_score"] = filters["min_score"]
+    return params
+
+
+def matches_filters(anime, filters):
+    if filters.get("type") and (anime.get("type") or "").lower() != filters["type"]:
+        return False
+    if filters.get("status") and anime.get("status") != ANIME_STATUSES[filters["status"]]:
+        return False
+    if filters.get("min_score") and (anime.get("score") or 0) < filters["min_score"]:
+        return False
+    return True
+
+
+class _PageSlot:
+    def __init__(self):
+        self.future = Future()
+        self.fetched = None
+
+
+class SearchPager:
+    # Serves search results page by page and fetches the following page in
+    # the background while the current one is read. Pages are kept per query
+    # (query + filters + page size) in a bounded LRU: at most max_queries
+    # queries and max_pages pages each. Every slot holds a Future, so a page
+    # that is still being prefetched is awaited rather than requested twice.
+    # Pages older than the response cache's "search" TTL are fetched again.
+    def __init__(self, jikan=None, catalog=None, max_queries=32, max_pages=20, prefetch_workers=2, ttl=None):
+        self.logger = logging.getLogger(__name__)
+        self.jikan = jikan or get_jikan_cache()
+        self.catalog = catalog or get_anime_catalog()
+        self.ttl = ttl if ttl is not None else self.jikan.ttls["search"]
+        self.max_queries = max_queries
+        self.max_pages = max_pages
+        self._lock = threading.Lock()
+        self._queries = OrderedDict()
+        self._prefetcher = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix="search-prefetch")
+        self.hits = 0
+        self.misses = 0
+        self.prefetches = 0
+
+    @staticmethod
+    def make_key(query, filters, page_size):
+        return json.dumps([query.strip().lower(), filters, page_size], sort_keys=True)
+
+    def fetch_page(self, query, filters, page, page_size):
+        # Typo-tolerant local search first; Jikan only for titles not in the
+        # snapshot or when browsing by filters alone
+        if query.strip():
+            local = [anime for anime in self.catalog.search(query, limit=LOCAL_RESULTS) if matches_filters(anime, filters)]
+            if local:
+                start = (page - 1) * page_size
+                return local[start:start + page_size], len(local) > start + page_size
+
+        body = self.jikan.get("search", "anime", params=search_params(query, filters, page, page_size))
+        return body.get("data", []), body.get("pagination", {}).get("has_next_page", False)
+
+    def _slot(self, key, page):
+        # Returns (future, owner); the caller owning a new slot must fill it
+        with self._lock:
+            pages = self._queries.get(key)
+            if pages is None:
+                pages = self._queries[key] = OrderedDict()
+                while len(self._queries) > self.max_queries:
+                    self._queries.popitem(last=False)
+            self._queries.move_to_end(key)
+            slot = pages.get(page)
+            expired = slot is not None and slot.fetched is not None and time.monotonic() - slot.fetched > self.ttl
+            if slot is not None and not expired:
+                pages.move_to_end(page)
+                return slot.future, False
+            slot = pages[page] = _PageSlot()
+            pages.move_to_end(page)
+            while len(pages) > self.max_pages:
+                pages.popitem(last=False)
+            return slot.future, True
+
+    def _fill(self, key, future, query, filters, page, page_size):
+        try:
+            result = self.fetch_page(query, filters, page, page_size)
+        except Exception as e:
+            # Failed pages are dropped so the next request retries them
+            with self._lock:
+                pages = self._queries.get(key)
+                if pages is not None and page in pages and pages[page].future is future:
+                    del pages[page]
+            future.set_exception(e)
+            return
+        with self._lock:
+            pages = self._queries.get(key)
+            if pages is not None and page in pages and pages[page].future is future:
+                pages[page].fetched = time.monotonic()
+        future.set_result(result)
+
+    def get(self, query, filters=None, page=1, page_size=10):
+        filters = filters or {}
+        key = self.make_key(query, filters, page_size)
+        future, owner = self._slot(key, page)
+        with self._lock:
+            if owner:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if owner:
+            self._fill(key, future, query, filters, page, page_size)
+        results, has_next = future.result()
+        if has_next:
+            self.prefetch(query, filters, page + 1, page_size)
+        return results, has_next
+
+    def prefetch(self, query, filters, page, page_size):
+        key = self.make_key(query, filters, page_size)
+        future, owner = self._slot(key, page)
+        if not owner:
+            return future
+        with self._lock:
+            self.prefetches += 1
+        self._prefetcher.submit(self._prefetch_one, key, future, query, filters, page, page_size)
+        return future
+
+    def _prefetch_one(self, key, future, query, filters, page, page_size):
+        self._fill(key, future, query, filters, page, page_size)
+        if future.exception() is not None:
+            self.logger.info("Prefetch of page %d for %r failed: %s", page, query, str(future.exception()))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queries": len(self._queries),
+                "pages": sum(len(pages) for pages in self._queries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "prefetches": self.prefetches,
+            }
+
+
+_pager = None
+_pager_lock = threading.Lock()
+
+
+def get_search_pager():
+    global _pager
+    with _pager_lock:
+        if _pager is None:
+            _pager = SearchPager()
+        return _pager
@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+
+LIST_TYPES = ("watching", "completed", "plan_to_watch")
+
+
+class WatchlistStore:
+    # SQLite-backed watchlists, one per user, keyed by (user_id, mal_id). Each
+    # anime lives in exactly one of a user's lists, so moving it is a
+    # single-row update and nothing is ever rewritten in bulk. Membership
+    # checks are primary-key lookups, so nothing is held in memory per user.
+    def __init__(self, path="anime_watchlist.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS watchlist ("
+                "user_id TEXT NOT NULL, mal_id INTEGER NOT NULL, list_type TEXT NOT NULL, "
+                "title TEXT, image_url TEXT, added_on TEXT, PRIMARY KEY (user_id, mal_id))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS watchlist_user_list ON watchlist (user_id, list_type, added_on)"
+            )
+
+    def for_user(self, user_id):
+        return UserWatchlist(self, user_id)
+
+    def add(self, user_id, anime, list_type):
+        if list_type not in LIST_TYPES:
+            raise ValueError(f"Unknown list: {list_type}")
+        entry = {
+            'mal_id': anime['mal_id'],
+            'title': anime['title'],
+            'image_url': anime.get('image_url') or anime['images']['jpg']['image_url'],
+            'added_on': anime.get('added_on') or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO watchlist (user_id, mal_id, list_type, title, image_url, added_on) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(user_id, mal_id) DO UPDATE SET "
+                "list_type = excluded.list_type, added_on = excluded.added_on",
+                (user_id, entry['mal_id'], list_type, entry['title'], entry['image_url'], entry['added_on'])
+            )
+        return entry
+
+    def remove(self, user_id, mal_id, list_type=None):
+        with self._lock, self._conn:
+            if list_type is None:
+                cursor = self._conn.execute(
+                    "DELETE FROM watchlist WHERE user_id = ? AND mal_id = ?", (user_id, mal_id)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "DELETE FROM watchlist WHERE user_id = ? AND mal_id = ? AND list_type = ?",
+                    (user_id, mal_id, list_type)
+                )
+            return cursor.rowcount > 0
+
+    def list_of(self, user_id, mal_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT list_type FROM watchlist WHERE user_id = ? AND mal_id = ?", (user_id, mal_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def count(self, user_id, list_type):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM watchlist WHERE user_id = ? AND list_type = ?", (user_id, list_type)
+            ).fetchone()[0]
+
+    def page(self, user_id, list_type, page=0, page_size=10):
+        # Newest first
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT mal_id, title, image_url, added_on FROM watchlist WHERE user_id = ? AND list_type = ? "
+                "ORDER BY added_on DESC, mal_id DESC LIMIT ? OFFSET ?",
+                (user_id, list_type, page_size, page * page_size)
+            ).fetchall()
+        return [
+            {'mal_id': mal_id, 'title': title, 'image_url': image_url, 'added_on': added_on}
+            for mal_id, title, image_url, added_on in rows
+        ]
+
+    def lists(self, user_id):
+        # mal_id -> list type for every entry of the user
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT mal_id, list_type FROM watchlist WHERE user_id = ?", (user_id,)
+            ).fetchall())
+
+    def import_json(self, user_id, path):
+        # Migration from the old anime_watchlist.json format into one user's
+        # lists; entries already present are left alone
+        with open(path, 'r') as f:
+            data = json.load(f)
+        imported = 0
+        for list_type, entries in data.items():
+            if list_type not in LIST_TYPES:
+                continue
+            for entry in entries:
+                if self.list_of(user_id, entry['mal_id']) is None:
+                    self.add(user_id, entry, list_type)
+                    imported += 1
+        return imported
+
+
+class UserWatchlist:
+    # One user's view of the shared store
+    def __init__(self, store, user_id):
+        self.store = store
+        self.user_id = user_id
+
+    def add(self, anime, list_type):
+        return self.store.add(self.user_id, anime, list_type)
+
+    def remove(self, mal_id, list_type=None):
+        return self.store.remove(self.user_id, mal_id, list_type)
+
+    def list_of(self, mal_id):
+        return self.store.list_of(self.user_id, mal_id)
+
+    def count(self, list_type):
+        return self.store.count(self.user_id, list_type)
+
+    def page(self, list_type, page=0, page_size=10):
+        return self.store.page(self.user_id, list_type, page, page_size)
+
+    def lists(self):
+        return self.store.lists(self.user_id)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_watchlist_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = WatchlistStore(os.environ.get("ANITRACK_WATCHLIST_PATH", "anime_watchlist.db"))
+        return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import an old anime_watchlist.json into the AniTrack watchlist store")
+    parser.add_argument("json_path", nargs="?", default="anime_watchlist.json")
+    parser.add_argument("--user", required=True, help="Watchlist id to import into (the ?user= value in the app URL)")
+    args = parser.parse_args()
+
+    imported = get_watchlist_store().import_json(args.user, args.json_path)
+    print(f"Imported {imported} entries into the watchlist of {args.user}")
+
+
+if __name__ == "__main__":
+    main()
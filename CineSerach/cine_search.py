@@ -5,6 +5,8 @@ from PIL import Image
 from io import BytesIO
 import pandas as pd
 
+from omdb_client import SEARCH_PAGE_SIZE, OMDbError, get_omdb_client
+
 # Set page configuration
 st.set_page_config(
     page_title="CineSearch - Movie Explorer",
@@ -72,9 +74,9 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# API key and base URL
+# API key and shared OMDb client (keep-alive session + detail fetch pool)
 API_KEY = "bb724370"  # Replace with your actual OMDB API key
-BASE_URL = "http://www.omdbapi.com/"
+omdb = get_omdb_client(API_KEY)
 
 # App title
 st.markdown('<h1 class="title">🎬 CineSearch</h1>', unsafe_allow_html=True)
@@ -84,6 +86,8 @@ st.markdown('<h3 style="text-align: center; color: #f0f2f6;">Explore Movies with
 with st.sidebar:
     st.markdown("## Search Filters")
     
+    search_mode = st.radio("Mode", ["Exact title", "Search list"], horizontal=True)
+    
     search_query = st.text_input("Search for a movie or TV show", value="", 
                                 placeholder="e.g. The Dark Knight")
     
@@ -96,29 +100,90 @@ with st.sidebar:
 
 # Function to fetch movie data
 def get_movie_data(title, type_="", year=""):
-    params = {
-        "apikey": API_KEY,
-        "t": title,
-        "type": type_,
-        "y": year,
-        "plot": "full"
-    }
-    
     try:
-        response = requests.get(BASE_URL, params=params)
-        data = response.json()
-        
-        if data.get("Response") == "True":
-            return data
-        else:
-            st.error(f"Error: {data.get('Error', 'Unknown error')}")
-            return None
+        return omdb.title(title, type_, year)
+    except OMDbError as e:
+        st.error(f"Error: {str(e)}")
+        return None
     except Exception as e:
         st.error(f"An error occurred: {str(e)}")
         return None
 
+# Function to move between search list pages
+def change_list_page(delta):
+    st.session_state.list_page = max(1, st.session_state.list_page + delta)
+
+# Function to render one movie of the search list
+def render_movie_row(movie):
+    col1, col2 = st.columns([1, 4])
+    
+    with col1:
+        if movie.get("Poster") and movie["Poster"] != "N/A":
+            st.image(movie["Poster"], width=120)
+    
+    with col2:
+        st.markdown(f'<h3 class="movie-title">{movie.get("Title", "N/A")}</h3>', unsafe_allow_html=True)
+        
+        info_line = f"{movie.get('Year', 'N/A')} • {movie.get('Rated', movie.get('Type', 'N/A'))} • {movie.get('Runtime', 'N/A')}"
+        st.markdown(f'<p class="movie-info">{info_line}</p>', unsafe_allow_html=True)
+        
+        if movie.get("Genre"):
+            genres_html = "".join([f'<span class="rating-badge">{genre}</span>' for genre in movie["Genre"].split(", ")])
+            st.markdown(genres_html, unsafe_allow_html=True)
+        
+        if movie.get("imdbRating", "N/A") != "N/A":
+            st.markdown(f'<p class="movie-info">IMDb: ⭐ {movie["imdbRating"]}/10</p>', unsafe_allow_html=True)
+        
+        if movie.get("Plot", "N/A") != "N/A":
+            st.markdown(f'<p class="movie-plot">{movie["Plot"]}</p>', unsafe_allow_html=True)
+
+# Function to render a page of search results, filling in details as they arrive
+def render_search_list(query, type_="", year=""):
+    # A new search starts again from the first page
+    search_key = (query, type_, year)
+    if st.session_state.get("list_search") != search_key:
+        st.session_state.list_search = search_key
+        st.session_state.list_page = 1
+    page = st.session_state.list_page
+    
+    try:
+        results, total = omdb.search(query, type_, year, page)
+    except Exception as e:
+        st.error(f"An error occurred: {str(e)}")
+        return
+    
+    if not results:
+        st.warning("No results found. Try a different search.")
+        return
+    
+    pages = (total + SEARCH_PAGE_SIZE - 1) // SEARCH_PAGE_SIZE
+    st.markdown(f'<p class="movie-info">{total} results • page {page} of {pages}</p>', unsafe_allow_html=True)
+    
+    # Placeholders keep the OMDb order while details arrive out of order
+    placeholders = {}
+    for movie in results:
+        if movie["imdbID"] not in placeholders:
+            placeholders[movie["imdbID"]] = st.empty()
+            with placeholders[movie["imdbID"]].container():
+                render_movie_row(movie)
+    
+    summaries = {movie["imdbID"]: movie for movie in results}
+    for imdb_id, details in omdb.iter_details(list(placeholders)):
+        if isinstance(details, Exception):
+            continue
+        with placeholders[imdb_id].container():
+            render_movie_row({**summaries[imdb_id], **details})
+    
+    col_prev, _, col_next = st.columns([1, 3, 1])
+    with col_prev:
+        st.button("← Previous", disabled=page <= 1, on_click=change_list_page, args=(-1,))
+    with col_next:
+        st.button("Next →", disabled=page >= pages, on_click=change_list_page, args=(1,))
+
 # Main content area
-if search_query:
+if search_query and search_mode == "Search list":
+    render_search_list(search_query, search_type, year)
+elif search_query:
     movie_data = get_movie_data(search_query, search_type, year)
     
     if movie_data:
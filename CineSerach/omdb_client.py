@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+BASE_URL = "http://www.omdbapi.com/"
+# OMDb returns search results 10 at a time
+SEARCH_PAGE_SIZE = 10
+
+
+class OMDbError(Exception):
+    # OMDb reports most failures as HTTP 200 with Response "False"
+    pass
+
+
+class OMDbClient:
+    # Keep-alive session shared by every request plus a bounded thread pool
+    # for fetching the detail records of a search page concurrently
+    def __init__(self, api_key, base_url=BASE_URL, timeout=(3.05, 10), max_workers=10):
+        self.logger = logging.getLogger(__name__)
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="omdb")
+
+    def get(self, **params):
+        params = {key: value for key, value in params.items() if value}
+        response = self.session.get(self.base_url, params={"apikey": self.api_key, **params}, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        if data.get("Response") != "True":
+            raise OMDbError(data.get("Error", "Unknown error"))
+        return data
+
+    def title(self, title, type_="", year=""):
+        return self.get(t=title, type=type_, y=year, plot="full")
+
+    def details(self, imdb_id):
+        return self.get(i=imdb_id, plot="short")
+
+    def search(self, query, type_="", year="", page=1):
+        # Returns (results, total_results) for one page of 10
+        try:
+            data = self.get(s=query, type=type_, y=year, page=page)
+        except OMDbError as e:
+            if str(e) == "Movie not found!":
+                return [], 0
+            raise
+        return data.get("Search", []), int(data.get("totalResults", 0))
+
+    def iter_details(self, imdb_ids):
+        # Yields (imdb_id, details or exception) in completion order, so
+        # callers can render each record as soon as it arrives
+        futures = {self._executor.submit(self.details, imdb_id): imdb_id for imdb_id in imdb_ids}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_omdb_client(api_key):
+    # One client per key so every Streamlit session reuses the connections
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = _clients[api_key] = OMDbClient(api_key)
+        return client
@@ -1,5 +1,6 @@
 import streamlit as st
-import os
+import time
+from exporters import EXPORTERS, export_to_string
 from transcriber import YouTubeTranscriber
 
 # Asset loading functions
@@ -17,6 +18,42 @@ def local_js(file_path):
     except Exception as e:
         st.warning(f"Couldn't load JavaScript: {str(e)}")
 
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+def render_search(index):
+    stats = index.stats()
+    query = st.text_input(
+        "Search all transcripts:",
+        placeholder=f"Search {stats['videos']} videos, {stats['segments']} segments..."
+    )
+
+    if 'search_jump' in st.session_state:
+        video_id, start = st.session_state.search_jump
+        st.video(f"https://www.youtube.com/watch?v={video_id}", start_time=int(start))
+
+    if not query:
+        return
+
+    started = time.perf_counter()
+    hits = index.search(query, limit=50)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    st.caption(f"{len(hits)} matches in {elapsed_ms:.1f} ms")
+
+    for position, hit in enumerate(hits):
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.markdown(f"**{hit['title']}** · [{format_duration(hit['start'])}]({hit['link']})")
+            st.markdown(hit["snippet"])
+        with col2:
+            if st.button("▶ Jump", key=f"jump_{hit['video_id']}_{position}"):
+                st.session_state.search_jump = (hit["video_id"], hit["start"])
+                st.rerun()
+
 def main():
     # Load assets
     local_css("assets/style.css")
@@ -39,29 +76,61 @@ def main():
     if 'transcriber' not in st.session_state:
         st.session_state.transcriber = YouTubeTranscriber()
 
+    mode = st.radio("Mode:", ["Transcribe", "Search transcripts"], horizontal=True)
+    if mode == "Search transcripts":
+        render_search(st.session_state.transcriber.transcript_index)
+        return
+
     # Main UI
     youtube_url = st.text_input("Enter YouTube URL:", placeholder="https://www.youtube.com/watch?v=...")
     model_choice = st.selectbox("Select Model Size:", list(st.session_state.transcriber.model_choices.keys()))
+    st.session_state.transcriber.vad = st.checkbox(
+        "Skip silent stretches (faster on videos with long pauses)",
+        value=st.session_state.transcriber.vad
+    )
 
     if youtube_url:
         # Show video thumbnail
         st.video(youtube_url)
         
         if st.button("Transcribe Video"):
+            transcriber = st.session_state.transcriber
+            progress_bar = st.progress(0.0, text="Fetching audio stream...")
+            live_box = st.container(height=300)
+            segments = []
+            lines = []
+            started = time.time()
+
+            def update_progress(processed_s, duration_s):
+                if not duration_s:
+                    progress_bar.progress(0.0, text=f"Transcribed {format_duration(processed_s)} of audio")
+                    return
+                fraction = min(processed_s / duration_s, 1.0)
+                elapsed = time.time() - started
+                eta = elapsed / fraction * (1.0 - fraction) if fraction else 0.0
+                progress_bar.progress(
+                    fraction,
+                    text=f"Transcribed {format_duration(processed_s)} / {format_duration(duration_s)} · ETA {format_duration(eta)}"
+                )
+
             try:
-                with st.spinner("Downloading and transcribing..."):
-                    audio_file = st.session_state.transcriber.download_youtube_audio(youtube_url)
-                    transcript = st.session_state.transcriber.transcribe_audio(
-                        audio_file, 
-                        st.session_state.transcriber.model_choices[model_choice]
-                    )
-                    st.session_state.formatted_transcript = st.session_state.transcriber.format_transcript(transcript)
-                    st.success("Transcription complete!")
+                for segment in transcriber.stream_url(
+                    youtube_url,
+                    transcriber.model_choices[model_choice],
+                    progress_callback=update_progress
+                ):
+                    segments.append(segment)
+                    line = transcriber.format_segment(segment)
+                    lines.append(line)
+                    live_box.text(line)
+
+                st.session_state.transcript_segments = segments
+                st.session_state.formatted_transcript = "\n\n".join(lines)
+                progress_bar.progress(1.0, text=f"Done in {format_duration(time.time() - started)}")
+                st.success("Transcription complete!")
 
             except Exception as e:
                 st.error(f"Error: {str(e)}")
-                if 'audio_file' in locals() and os.path.exists(audio_file):
-                    os.remove(audio_file)
 
     # Show results if available
     if 'formatted_transcript' in st.session_state:
@@ -69,11 +138,16 @@ def main():
         st.text_area("Full Transcript", st.session_state.formatted_transcript, height=300)
 
         # Download button
+        export_format = st.selectbox(
+            "Download format:",
+            list(EXPORTERS.keys()),
+            format_func=lambda fmt: EXPORTERS[fmt]["label"]
+        )
         st.download_button(
             label="Download Transcript",
-            data=st.session_state.formatted_transcript,
-            file_name="transcript.txt",
-            mime="text/plain"
+            data=export_to_string(st.session_state.get("transcript_segments", []), export_format),
+            file_name=f"transcript.{export_format}",
+            mime=EXPORTERS[export_format]["mime"]
         )
 
 if __name__ == "__main__":
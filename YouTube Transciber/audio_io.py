@@ -0,0 +1,137 @@
+import subprocess
+
+import numpy as np
+
+
+SAMPLING_RATE = 16000
+
+
+def resolve_audio_stream(url):
+    # Ask yt-dlp for the best audio stream URL without downloading anything
+    import yt_dlp as youtube_dl
+
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'quiet': True,
+        'noplaylist': True,
+    }
+    try:
+        with youtube_dl.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        raise Exception(f"Failed to resolve audio stream: {str(e)}")
+
+    if not info.get("url"):
+        raise Exception("Failed to resolve audio stream: no stream URL")
+    return info
+
+
+def ffmpeg_decode_command(source, sampling_rate=SAMPLING_RATE, headers=None, start_s=0):
+    command = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+    if headers:
+        header_lines = "".join(f"{key}: {value}\r\n" for key, value in headers.items())
+        command += ["-headers", header_lines]
+    if start_s:
+        command += ["-ss", f"{start_s:.3f}"]
+    command += [
+        "-i", source,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(sampling_rate),
+        "-f", "f32le",
+        "pipe:1",
+    ]
+    return command
+
+
+def decode_audio(source, sampling_rate=SAMPLING_RATE, headers=None):
+    # Decode any ffmpeg-readable file or URL to mono float32 PCM in memory
+    command = ffmpeg_decode_command(source, sampling_rate, headers)
+    try:
+        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    except FileNotFoundError:
+        raise Exception("ffmpeg was not found, it is required to decode audio")
+
+    if process.returncode != 0:
+        raise Exception(f"ffmpeg failed to decode audio: {process.stderr.decode(errors='ignore').strip()}")
+
+    audio = np.frombuffer(process.stdout, dtype=np.float32)
+    if audio.size == 0:
+        raise Exception("ffmpeg produced no audio")
+    return audio
+
+
+def load_youtube_audio(url, sampling_rate=SAMPLING_RATE):
+    info = resolve_audio_stream(url)
+    return decode_audio(info["url"], sampling_rate, info.get("http_headers"))
+
+
+def stream_pcm(source, sampling_rate=SAMPLING_RATE, headers=None, block_s=5, start_s=0):
+    # Yields float32 blocks as ffmpeg produces them so only one block is held
+    command = ffmpeg_decode_command(source, sampling_rate, headers, start_s)
+    block_bytes = int(block_s * sampling_rate) * 4
+    try:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise Exception("ffmpeg was not found, it is required to decode audio")
+
+    try:
+        pending = b""
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            data = pending + data
+            usable = len(data) - len(data) % 4
+            pending = data[usable:]
+            if usable:
+                yield np.frombuffer(data[:usable], dtype=np.float32)
+        process.wait()
+        if process.returncode != 0:
+            raise Exception(f"ffmpeg failed to decode audio: {process.stderr.read().decode(errors='ignore').strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+
+def iter_pcm_file(path, sampling_rate=SAMPLING_RATE, block_s=5, start_s=0):
+    # Raw little-endian float32 file, paged in lazily through a memory map
+    audio = np.memmap(path, dtype=np.float32, mode="r")
+    yield from iter_array(audio, sampling_rate, block_s, start_s)
+
+
+def iter_array(audio, sampling_rate=SAMPLING_RATE, block_s=5, start_s=0):
+    block = int(block_s * sampling_rate)
+    for start in range(int(start_s * sampling_rate), len(audio), block):
+        yield audio[start:start + block]
+
+
+def skip_samples(blocks, count):
+    for block in blocks:
+        if count >= len(block):
+            count -= len(block)
+            continue
+        yield block[count:]
+        count = 0
+
+
+def open_audio_blocks(source, sampling_rate=SAMPLING_RATE, block_s=5, start_s=0):
+    # source may also be a callable taking start_s and returning blocks, which
+    # lets resumable callers reopen a stream at an offset
+    if isinstance(source, np.ndarray):
+        return iter_array(source, sampling_rate, block_s, start_s)
+    if isinstance(source, str):
+        if source.endswith((".f32", ".pcm")):
+            return iter_pcm_file(source, sampling_rate, block_s, start_s)
+        return stream_pcm(source, sampling_rate, block_s=block_s, start_s=start_s)
+    if callable(source):
+        return iter(source(start_s))
+    return skip_samples(iter(source), int(start_s * sampling_rate))
+
+
+def stream_youtube_audio(url, sampling_rate=SAMPLING_RATE, block_s=5):
+    info = resolve_audio_stream(url)
+    return stream_pcm(info["url"], sampling_rate, info.get("http_headers"), block_s)
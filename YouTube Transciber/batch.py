@@ -0,0 +1,200 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from exporters import EXPORTERS, export_transcript
+from segments import segments_to_result
+from transcript_cache import extract_video_id
+from transcriber import YouTubeTranscriber
+
+
+_DONE = object()
+
+
+def read_url_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def expand_playlist(url):
+    import yt_dlp as youtube_dl
+
+    ydl_opts = {'quiet': True, 'extract_flat': True}
+    try:
+        with youtube_dl.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        raise Exception(f"Failed to read playlist: {str(e)}")
+
+    if not info.get("entries"):
+        return [url]
+    urls = []
+    for entry in info["entries"]:
+        if not entry:
+            continue
+        if entry.get("url", "").startswith("http"):
+            urls.append(entry["url"])
+        elif entry.get("id"):
+            urls.append(f"https://www.youtube.com/watch?v={entry['id']}")
+    return urls
+
+
+class Manifest:
+    # Append-only JSONL log of finished items; the last record per URL wins
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.records = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.records[record["url"]] = record
+
+    def is_done(self, url):
+        record = self.records.get(url)
+        return record is not None and record["status"] == "done"
+
+    def record(self, url, status, **fields):
+        record = {"url": url, "status": status, "time": time.strftime("%Y-%m-%d %H:%M:%S"), **fields}
+        with self._lock:
+            self.records[url] = record
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+class BatchRunner:
+    # Downloads run ahead of inference through a bounded queue, so the next
+    # video's audio is fetched while the current one is being transcribed
+    def __init__(self, transcriber, model_name, output_dir, workers=1, download_workers=1, prefetch=2, output_format="txt"):
+        self.logger = logging.getLogger(__name__)
+        self.transcriber = transcriber
+        self.model_name = model_name
+        self.output_dir = output_dir
+        self.workers = workers
+        self.download_workers = download_workers
+        self.output_format = output_format
+        self.audio_queue = queue.Queue(maxsize=prefetch)
+        os.makedirs(output_dir, exist_ok=True)
+        self.manifest = Manifest(os.path.join(output_dir, "manifest.jsonl"))
+
+    def output_path(self, url):
+        name = extract_video_id(url) or hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.output_dir, f"{name}.{self.output_format}")
+
+    def write_output(self, url, transcript):
+        path = self.output_path(url)
+        with open(path, "w", encoding="utf-8") as f:
+            export_transcript(transcript, self.output_format, f)
+        return path
+
+    def _download(self, url_queue):
+        while True:
+            try:
+                url = url_queue.get_nowait()
+            except queue.Empty:
+                return
+            key = self.transcriber.cache_key(url, self.model_name)
+            cached = self.transcriber.transcript_cache.get(key)
+            if cached is not None:
+                self.audio_queue.put((url, None, cached))
+                continue
+            try:
+                audio = self.transcriber.fetch_youtube_audio(url)
+            except Exception as e:
+                self.logger.error("%s: %s", url, str(e))
+                self.manifest.record(url, "failed", error=str(e))
+                continue
+            self.audio_queue.put((url, audio, None))
+
+    def _transcribe(self):
+        while True:
+            item = self.audio_queue.get()
+            if item is _DONE:
+                return
+            url, audio, transcript = item
+            try:
+                if transcript is None:
+                    if self.transcriber.cross_batch:
+                        # Windows from all workers are batched together by the scheduler
+                        transcript = segments_to_result(list(self.transcriber.transcribe_stream(audio, self.model_name)))
+                    else:
+                        transcript = self.transcriber.transcribe_audio(audio, self.model_name)
+                    self.transcriber.store_transcript(url, self.model_name, transcript)
+                path = self.write_output(url, transcript)
+                self.manifest.record(url, "done", output=path)
+                self.logger.info("Finished %s -> %s", url, path)
+            except Exception as e:
+                self.logger.error("%s: %s", url, str(e))
+                self.manifest.record(url, "failed", error=str(e))
+
+    def run(self, urls):
+        pending = [url for url in dict.fromkeys(urls) if not self.manifest.is_done(url)]
+        skipped = len(set(urls)) - len(pending)
+        if skipped:
+            self.logger.info("Skipping %d finished items from manifest", skipped)
+
+        url_queue = queue.Queue()
+        for url in pending:
+            url_queue.put(url)
+
+        downloaders = [threading.Thread(target=self._download, args=(url_queue,), daemon=True) for _ in range(self.download_workers)]
+        transcribers = [threading.Thread(target=self._transcribe, daemon=True) for _ in range(self.workers)]
+        for thread in downloaders + transcribers:
+            thread.start()
+
+        for thread in downloaders:
+            thread.join()
+        for _ in transcribers:
+            self.audio_queue.put(_DONE)
+        for thread in transcribers:
+            thread.join()
+
+        done = sum(1 for url in pending if self.manifest.is_done(url))
+        return {"total": len(set(urls)), "skipped": skipped, "done": done, "failed": len(pending) - done}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe a list of YouTube URLs or a playlist")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--urls", help="Text file with one URL per line")
+    source.add_argument("--playlist", help="YouTube playlist URL")
+    parser.add_argument("--output-dir", default="transcripts")
+    parser.add_argument("--model", default="Whisper Tiny", help="Model choice name or Hugging Face model id")
+    parser.add_argument("--format", choices=list(EXPORTERS), default="txt", help="Output format per video")
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent transcriptions")
+    parser.add_argument("--download-workers", type=int, default=1, help="Concurrent downloads")
+    parser.add_argument("--cross-batch", action="store_true", help="Batch 30 s windows across concurrent videos")
+    parser.add_argument("--prefetch", type=int, default=2, help="Downloaded items waiting for a worker")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    urls = read_url_file(args.urls) if args.urls else expand_playlist(args.playlist)
+    transcriber = YouTubeTranscriber()
+    transcriber.cross_batch = args.cross_batch or transcriber.cross_batch
+    model_name = transcriber.model_choices.get(args.model, args.model)
+
+    runner = BatchRunner(
+        transcriber,
+        model_name,
+        args.output_dir,
+        workers=args.workers,
+        download_workers=args.download_workers,
+        prefetch=args.prefetch,
+        output_format=args.format
+    )
+    summary = runner.run(urls)
+    print(f"{summary['done']} done, {summary['failed']} failed, {summary['skipped']} skipped of {summary['total']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+from concurrent.futures import Future
+from collections import deque
+import os
+import queue
+import threading
+import time
+import logging
+
+
+# Rough working memory for one 30 s window during Whisper inference on CPU
+# (log-mel features, encoder activations and decoder cache), per model size
+WINDOW_MEMORY_MB = {"tiny": 48, "base": 64, "small": 128, "medium": 256}
+
+
+def available_memory_bytes():
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def window_memory_bytes(model_name):
+    for size, megabytes in WINDOW_MEMORY_MB.items():
+        if size in model_name:
+            return megabytes * 1024 * 1024
+    return max(WINDOW_MEMORY_MB.values()) * 1024 * 1024
+
+
+class BatchScheduler:
+    # Collects 30 s windows submitted by any number of jobs and runs them
+    # through the model together. Each window gets a Future, so results are
+    # routed back to the submitting job regardless of batch composition.
+    def __init__(self, model_pool, model_name, max_batch_size=8, max_wait_s=0.05, memory_fraction=0.5):
+        self.logger = logging.getLogger(__name__)
+        self.model_pool = model_pool
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_s
+        self.memory_fraction = memory_fraction
+        self.batches = 0
+        self.windows = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"batch-scheduler-{model_name}", daemon=True)
+        self._thread.start()
+
+    def batch_size(self):
+        # Shrinks the batch when the machine is short on memory
+        available = available_memory_bytes()
+        if available is None:
+            return self.max_batch_size
+        fits = int(available * self.memory_fraction // window_memory_bytes(self.model_name))
+        return max(1, min(self.max_batch_size, fits))
+
+    def submit(self, window):
+        if self._closed:
+            raise Exception("Batch scheduler is closed")
+        future = Future()
+        self._queue.put((window, future))
+        return future
+
+    def map_windows(self, windows, skip=None, max_in_flight=None):
+        # Yields (window, result) in window order while keeping a few windows
+        # queued so they can share batches with other jobs. Windows for which
+        # skip(window) is true are passed through with a None result.
+        max_in_flight = max_in_flight or self.max_batch_size
+        pending = deque()
+        for window in windows:
+            if skip is not None and skip(window):
+                future = Future()
+                future.set_result(None)
+            else:
+                future = self.submit(window)
+            pending.append((window, future))
+            while len(pending) >= max_in_flight:
+                done_window, done_future = pending.popleft()
+                yield done_window, done_future.result()
+        while pending:
+            done_window, done_future = pending.popleft()
+            yield done_window, done_future.result()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        limit = self.batch_size()
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < limit:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            batch = [(window, future) for window, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                with self.model_pool.lease(self.model_name) as asr:
+                    inputs = [{"raw": window.samples, "sampling_rate": window.sampling_rate} for window, _ in batch]
+                    results = asr(inputs, batch_size=len(inputs), return_timestamps=True)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.windows += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "windows": self.windows,
+            "mean_batch": round(self.windows / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_batch_scheduler(model_pool, model_name):
+    # One scheduler per model, shared by every session in the process
+    with _schedulers_lock:
+        scheduler = _schedulers.get(model_name)
+        if scheduler is None:
+            scheduler = BatchScheduler(
+                model_pool,
+                model_name,
+                max_batch_size=int(os.environ.get("TRANSCRIBER_MAX_BATCH", "8"))
+            )
+            _schedulers[model_name] = scheduler
+        return scheduler
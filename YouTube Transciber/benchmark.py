@@ -0,0 +1,500 @@
+import argparse
+import gc
+import glob
+import json
+import os
+import platform
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from audio_io import SAMPLING_RATE, decode_audio
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def encode_mp3(source, target):
+    # Same settings as the FFmpegExtractAudio postprocessor in download_youtube_audio
+    subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-i", source,
+         "-vn", "-codec:a", "libmp3lame", "-b:a", "192k", target],
+        check=True
+    )
+
+
+def mp3_path(source, work_dir):
+    mp3_file = os.path.join(work_dir, "audio.mp3")
+    encode_mp3(source, mp3_file)
+    # The ASR pipeline decodes file inputs with ffmpeg to f32le at 16 kHz
+    return decode_audio(mp3_file, SAMPLING_RATE)
+
+
+def bench_decode(args):
+    work_dir = tempfile.mkdtemp(prefix="bench_decode_")
+    try:
+        results = {"source": args.source, "repeats": args.repeats, "mp3_s": [], "direct_s": []}
+        for _ in range(args.repeats):
+            _, elapsed = timed(mp3_path, args.source, work_dir)
+            results["mp3_s"].append(elapsed)
+            audio, elapsed = timed(decode_audio, args.source, SAMPLING_RATE)
+            results["direct_s"].append(elapsed)
+
+        results["audio_s"] = len(audio) / SAMPLING_RATE
+        mp3_best = min(results["mp3_s"])
+        direct_best = min(results["direct_s"])
+        results["speedup"] = mp3_best / direct_best if direct_best else float("inf")
+
+        print(f"Audio length:   {results['audio_s']:.1f} s")
+        print(f"MP3 path:       {mp3_best:.3f} s (encode 192 kbps + decode)")
+        print(f"Direct PCM:     {direct_best:.3f} s")
+        print(f"Speedup:        {results['speedup']:.2f}x")
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_parallel(args):
+    from transcriber import YouTubeTranscriber
+
+    transcriber = YouTubeTranscriber()
+    audio = decode_audio(args.source, SAMPLING_RATE)
+    audio_s = len(audio) / SAMPLING_RATE
+    # Load once so the sequential run is not charged for the model load
+    transcriber.load_asr_model(args.model)
+
+    results = {"source": args.source, "model": args.model, "audio_s": audio_s, "runs": []}
+    _, elapsed = timed(lambda: list(transcriber.transcribe_stream(audio, args.model)))
+    results["runs"].append({"mode": "sequential", "workers": 1, "seconds": elapsed, "rtf": elapsed / audio_s})
+
+    for mode in args.modes:
+        for workers in args.workers:
+            _, elapsed = timed(transcriber.transcribe_parallel, audio, args.model, workers, mode)
+            results["runs"].append({"mode": mode, "workers": workers, "seconds": elapsed, "rtf": elapsed / audio_s})
+
+    print(f"Audio length: {audio_s:.1f} s, model {args.model}")
+    for run in results["runs"]:
+        print(f"{run['mode']:>10} x{run['workers']:<3} {run['seconds']:8.2f} s   RTF {run['rtf']:.3f}")
+    return results
+
+
+FIXTURES_DIR = "benchmark_fixtures"
+
+
+def load_fixtures(fixtures_dir):
+    # Each fixture is <name>.wav (any ffmpeg-readable file) plus <name>.txt
+    # holding the reference transcript
+    fixtures = []
+    for text_path in sorted(glob.glob(os.path.join(fixtures_dir, "*.txt"))):
+        stem = os.path.splitext(text_path)[0]
+        audio_paths = [path for path in glob.glob(stem + ".*") if path != text_path]
+        if not audio_paths:
+            continue
+        with open(text_path, "r", encoding="utf-8") as f:
+            reference = f.read().strip()
+        fixtures.append({
+            "name": os.path.basename(stem),
+            "audio": decode_audio(audio_paths[0], SAMPLING_RATE),
+            "reference": reference,
+        })
+    if not fixtures:
+        raise Exception(f"No fixtures found in {fixtures_dir}, run 'benchmark.py fixtures' first")
+    return fixtures
+
+
+def normalize_words(text):
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    # Levenshtein distance over words, one row at a time
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def fetch_fixtures(args):
+    # Populates the fixture directory with short LibriSpeech clips; needs the
+    # optional `datasets` and `soundfile` packages
+    try:
+        from datasets import load_dataset
+        import soundfile
+    except ImportError:
+        raise Exception("Fetching fixtures requires `pip install datasets soundfile`")
+
+    os.makedirs(args.fixtures, exist_ok=True)
+    dataset = load_dataset("hf-internal-testing/librispeech_asr_dummy", "clean", split="validation")
+    for index, sample in enumerate(dataset.select(range(min(args.count, len(dataset))))):
+        name = os.path.join(args.fixtures, f"librispeech_{index:02d}")
+        soundfile.write(name + ".wav", sample["audio"]["array"], sample["audio"]["sampling_rate"])
+        with open(name + ".txt", "w", encoding="utf-8") as f:
+            f.write(sample["text"])
+    print(f"Wrote {min(args.count, len(dataset))} fixtures to {args.fixtures}")
+    return {"fixtures": args.fixtures}
+
+
+def bench_quantization(args):
+    from transcriber import YouTubeTranscriber
+
+    transcriber = YouTubeTranscriber()
+    fixtures = load_fixtures(args.fixtures)
+    audio_s = sum(len(fixture["audio"]) for fixture in fixtures) / SAMPLING_RATE
+    results = {"fixtures": len(fixtures), "audio_s": audio_s, "runs": []}
+
+    for model in args.models:
+        for precision in args.precisions:
+            model_name = model if precision == "fp32" else f"{model}:{precision}"
+            try:
+                transcriber.load_asr_model(model_name)
+            except Exception as e:
+                print(f"Skipping {model_name}: {str(e)}")
+                continue
+
+            elapsed = 0.0
+            errors = []
+            for fixture in fixtures:
+                result, seconds = timed(transcriber.transcribe_audio, fixture["audio"], model_name)
+                elapsed += seconds
+                errors.append(word_error_rate(fixture["reference"], result.get("text", "")))
+            results["runs"].append({
+                "model": model,
+                "precision": precision,
+                "seconds": elapsed,
+                "rtf": elapsed / audio_s,
+                "wer": sum(errors) / len(errors),
+            })
+
+    print(f"{len(fixtures)} fixtures, {audio_s:.1f} s of audio")
+    print(f"{'model':<24} {'precision':<9} {'RTF':>7} {'WER':>7}")
+    for run in results["runs"]:
+        print(f"{run['model']:<24} {run['precision']:<9} {run['rtf']:7.3f} {run['wer']:7.2%}")
+    return results
+
+
+def bench_vad(args):
+    from transcriber import YouTubeTranscriber
+
+    transcriber = YouTubeTranscriber()
+    fixtures = load_fixtures(args.fixtures)
+    silence = np.zeros(int(args.pad_silence * SAMPLING_RATE), dtype=np.float32)
+    transcriber.load_asr_model(args.model)
+
+    results = {"model": args.model, "pad_silence_s": args.pad_silence, "fixtures": []}
+    for fixture in fixtures:
+        # Optional leading/trailing silence stands in for intros and pauses
+        audio = np.concatenate([silence, fixture["audio"], silence])
+        row = {"name": fixture["name"], "audio_s": len(audio) / SAMPLING_RATE}
+        for use_vad in (False, True):
+            transcriber.vad = use_vad
+            segments, elapsed = timed(lambda: list(transcriber.transcribe_stream(audio, args.model)))
+            text = " ".join(segment["text"] for segment in segments)
+            label = "vad" if use_vad else "full"
+            row[f"{label}_s"] = elapsed
+            row[f"{label}_wer"] = word_error_rate(fixture["reference"], text)
+        results["fixtures"].append(row)
+
+    full_s = sum(row["full_s"] for row in results["fixtures"])
+    vad_s = sum(row["vad_s"] for row in results["fixtures"])
+    results["saved_s"] = full_s - vad_s
+    results["saved_ratio"] = (full_s - vad_s) / full_s if full_s else 0.0
+
+    print(f"{'fixture':<24} {'full s':>8} {'vad s':>8} {'full WER':>9} {'vad WER':>8}")
+    for row in results["fixtures"]:
+        print(f"{row['name']:<24} {row['full_s']:8.2f} {row['vad_s']:8.2f} {row['full_wer']:9.2%} {row['vad_wer']:8.2%}")
+    print(f"Inference time saved: {results['saved_s']:.2f} s ({results['saved_ratio']:.1%})")
+    return results
+
+
+HEAVY_MODULES = ("torch", "transformers", "yt_dlp")
+
+
+def parse_importtime(stderr):
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in re.split(r"[:|]", line, maxsplit=3)]
+        modules.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us)})
+    return modules
+
+
+def measure_import(module, repeats):
+    # A fresh interpreter per run so nothing is already in sys.modules
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        wall_s = time.perf_counter() - start
+        if process.returncode != 0:
+            raise Exception(f"Importing {module} failed: {process.stderr.strip().splitlines()[-1]}")
+        if best is None or wall_s < best["wall_s"]:
+            modules = parse_importtime(process.stderr)
+            top_level = [entry for entry in modules if "." not in entry["module"]]
+            best = {
+                "module": module,
+                "wall_s": wall_s,
+                "import_s": next((e["cumulative_us"] for e in modules if e["module"] == module), 0) / 1e6,
+                "heavy_loaded": [name for name in process.stdout.strip().split(",") if name],
+                "slowest": sorted(top_level, key=lambda e: e["cumulative_us"], reverse=True)[:10],
+            }
+    return best
+
+
+def bench_imports(args):
+    results = {"runs": [measure_import(module, args.repeats) for module in args.modules]}
+    for run in results["runs"]:
+        heavy = ", ".join(run["heavy_loaded"]) or "none"
+        print(f"import {run['module']}: {run['import_s'] * 1000:.0f} ms (process {run['wall_s'] * 1000:.0f} ms), heavy modules loaded: {heavy}")
+        for entry in run["slowest"][:5]:
+            print(f"    {entry['module']:<28} {entry['cumulative_us'] / 1000:8.1f} ms")
+    return results
+
+
+def synthesize_audio(seconds, sampling_rate=SAMPLING_RATE, seed=0):
+    # Speech-like test signal: a gliding harmonic voice gated into syllables,
+    # with pauses and background noise. Deterministic for a given seed.
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sampling_rate)) / sampling_rate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sampling_rate
+    voice = sum(np.sin(phase * harmonic) / harmonic for harmonic in range(1, 6))
+    syllables = (np.sin(2 * np.pi * 4 * t) > 0).astype(np.float32)
+    pauses = (np.sin(2 * np.pi * 0.1 * t) > -0.7).astype(np.float32)
+    audio = 0.3 * voice * syllables * pauses + 0.01 * rng.standard_normal(len(t))
+    return audio.astype(np.float32)
+
+
+def write_wav(path, audio, sampling_rate=SAMPLING_RATE):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sampling_rate)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+def environment_info():
+    info = {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()}
+    try:
+        import torch
+        import transformers
+        info["torch"] = torch.__version__
+        info["transformers"] = transformers.__version__
+        info["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    try:
+        info["commit"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+
+def bench_suite_model(args):
+    # One model over every input, run by bench_suite in its own process so
+    # ru_maxrss is this model's peak and not that of an earlier, larger one
+    from model_pool import ModelPool, load_pipeline
+    from transcriber import YouTubeTranscriber
+
+    # Cold: the first load in this process. Warm: a second real load once the
+    # weights are in the OS page cache, into the pool the runs use. The cold
+    # copy is dropped first so only one copy counts towards peak RSS.
+    model_name = args.model
+    try:
+        asr, cold_load_s = timed(load_pipeline, model_name)
+    except Exception as e:
+        return {"skipped": str(e), "runs": []}
+    del asr
+    gc.collect()
+    pool = ModelPool(max_models=1)
+    transcriber = YouTubeTranscriber(model_pool=pool)
+    _, warm_load_s = timed(pool.get, model_name)
+
+    runs = []
+    for name, path in zip(args.names, args.inputs):
+        audio, decode_s = timed(decode_audio, path, SAMPLING_RATE)
+        audio_s = len(audio) / SAMPLING_RATE
+        transcript, inference_s = timed(transcriber.transcribe_audio, audio, model_name)
+        _, format_s = timed(transcriber.format_transcript, transcript)
+        total_s = decode_s + inference_s + format_s
+        runs.append({
+            "model": model_name,
+            "input": name,
+            "audio_s": audio_s,
+            "decode_s": decode_s,
+            "load_cold_s": cold_load_s,
+            "load_warm_s": warm_load_s,
+            "inference_s": inference_s,
+            "format_s": format_s,
+            "rtf": inference_s / audio_s,
+            "throughput_audio_s_per_s": audio_s / total_s,
+            "peak_rss_mb": peak_rss_mb(),
+        })
+    return {"runs": runs}
+
+
+def bench_suite(args):
+    from transcriber import YouTubeTranscriber
+
+    work_dir = tempfile.mkdtemp(prefix="bench_suite_")
+    try:
+        inputs = []
+        for seconds in args.lengths:
+            path = os.path.join(work_dir, f"synthetic_{seconds}s.wav")
+            write_wav(path, synthesize_audio(seconds))
+            inputs.append((f"synthetic_{seconds}s", path))
+        for path in args.audio or []:
+            inputs.append((os.path.basename(path), os.path.abspath(path)))
+
+        models = args.models or list(YouTubeTranscriber().model_choices.values())
+        results = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "environment": environment_info(),
+            "runs": [],
+        }
+
+        for index, model_name in enumerate(models):
+            output = os.path.join(work_dir, f"model_{index}.json")
+            process = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--output", output, "suite-model",
+                 "--model", model_name, "--names", *[name for name, _ in inputs],
+                 "--inputs", *[path for _, path in inputs]]
+            )
+            if process.returncode != 0 or not os.path.exists(output):
+                print(f"Skipping {model_name}: benchmark process exited with {process.returncode}")
+                continue
+            with open(output, "r", encoding="utf-8") as f:
+                model_results = json.load(f)
+            if model_results.get("skipped"):
+                print(f"Skipping {model_name}: {model_results['skipped']}")
+            results["runs"].extend(model_results["runs"])
+
+        print(f"{'model':<28} {'input':<18} {'decode':>8} {'cold':>7} {'warm':>7} {'infer':>8} {'format':>8} {'RTF':>6} {'RSS MB':>8}")
+        for run in results["runs"]:
+            print(
+                f"{run['model']:<28} {run['input']:<18} {run['decode_s']:8.3f} {run['load_cold_s']:7.2f} "
+                f"{run['load_warm_s']:7.2f} {run['inference_s']:8.2f} {run['format_s']:8.4f} "
+                f"{run['rtf']:6.3f} {run['peak_rss_mb']:8.0f}"
+            )
+
+        if args.baseline:
+            results["regressions"] = compare_results(args.baseline, results, args.tolerance)
+        return results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def compare_results(baseline_path, results, tolerance):
+    # Flags runs whose RTF grew by more than `tolerance` against a saved run
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(run["model"], run["input"]): run for run in baseline.get("runs", [])}
+
+    regressions = []
+    for run in results["runs"]:
+        old = previous.get((run["model"], run["input"]))
+        if old and run["rtf"] > old["rtf"] * (1 + tolerance):
+            regressions.append({"model": run["model"], "input": run["input"], "old_rtf": old["rtf"], "new_rtf": run["rtf"]})
+            print(f"REGRESSION {run['model']} {run['input']}: RTF {old['rtf']:.3f} -> {run['rtf']:.3f}")
+    if not regressions:
+        print(f"No regressions against {baseline_path}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YouTube Transcriber benchmarks")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    decode_parser = subparsers.add_parser("decode", help="MP3 round trip vs direct PCM decode")
+    decode_parser.add_argument("source", help="Local audio/video file to decode")
+    decode_parser.add_argument("--repeats", type=int, default=3)
+    decode_parser.set_defaults(func=bench_decode)
+
+    parallel_parser = subparsers.add_parser("parallel", help="Real-time factor of parallel vs sequential inference")
+    parallel_parser.add_argument("source", help="Local audio/video file to transcribe")
+    parallel_parser.add_argument("--model", default="openai/whisper-tiny")
+    parallel_parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parallel_parser.add_argument("--modes", nargs="+", choices=["process", "thread"], default=["process", "thread"])
+    parallel_parser.set_defaults(func=bench_parallel)
+
+    fixtures_parser = subparsers.add_parser("fixtures", help="Download short speech fixtures")
+    fixtures_parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    fixtures_parser.add_argument("--count", type=int, default=8)
+    fixtures_parser.set_defaults(func=fetch_fixtures)
+
+    quant_parser = subparsers.add_parser("quantization", help="WER and RTF of int8/bf16 vs fp32")
+    quant_parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    quant_parser.add_argument("--models", nargs="+", default=["openai/whisper-tiny", "openai/whisper-small"])
+    quant_parser.add_argument("--precisions", nargs="+", choices=["fp32", "int8", "bf16"], default=["fp32", "int8", "bf16"])
+    quant_parser.set_defaults(func=bench_quantization)
+
+    vad_parser = subparsers.add_parser("vad", help="Inference time saved by the VAD pre-pass")
+    vad_parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    vad_parser.add_argument("--model", default="openai/whisper-tiny")
+    vad_parser.add_argument("--pad-silence", type=float, default=30.0, help="Seconds of silence added around each fixture")
+    vad_parser.set_defaults(func=bench_vad)
+
+    imports_parser = subparsers.add_parser("imports", help="Cold import time of the app modules (-X importtime)")
+    imports_parser.add_argument("--modules", nargs="+", default=["transcriber", "app"])
+    imports_parser.add_argument("--repeats", type=int, default=3)
+    imports_parser.set_defaults(func=bench_imports)
+
+    suite_parser = subparsers.add_parser("suite", help="Per-stage timings on synthetic and local audio, fully offline")
+    suite_parser.add_argument("--lengths", type=int, nargs="+", default=[10, 60, 300], help="Synthetic clip lengths in seconds")
+    suite_parser.add_argument("--audio", nargs="+", help="Extra local audio files")
+    suite_parser.add_argument("--models", nargs="+", help="Model ids (default: every entry in model_choices)")
+    suite_parser.add_argument("--baseline", help="Earlier results JSON to check for regressions")
+    suite_parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative RTF increase")
+    suite_parser.set_defaults(func=bench_suite)
+
+    # Internal: one model of the suite, run in a fresh process by bench_suite
+    suite_model_parser = subparsers.add_parser("suite-model")
+    suite_model_parser.add_argument("--model", required=True)
+    suite_model_parser.add_argument("--names", nargs="+", required=True)
+    suite_model_parser.add_argument("--inputs", nargs="+", required=True)
+    suite_model_parser.set_defaults(func=bench_suite_model)
+
+    args = parser.parse_args()
+    results = args.func(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
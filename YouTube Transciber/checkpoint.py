@@ -0,0 +1,57 @@
+import json
+import os
+import logging
+
+
+class WindowCheckpoint:
+    # Append-only JSONL record of finished windows. The first line holds the
+    # settings the windows were produced with; a checkpoint written with other
+    # settings is discarded instead of being resumed.
+    def __init__(self, path, settings):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.settings = settings
+
+    def load(self):
+        # Returns [(window_index, segments), ...] for consecutive finished windows
+        if not os.path.exists(self.path):
+            return []
+        windows = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                header = None
+            if header != {"settings": self.settings}:
+                self.logger.info("Ignoring checkpoint %s written with other settings", self.path)
+                return []
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write
+                    break
+                if record["window"] != len(windows):
+                    break
+                windows.append((record["window"], record["segments"]))
+        return windows
+
+    def start(self, windows):
+        # Rewrites the file with the header and the windows being kept, which
+        # also drops any torn line left by a crash
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"settings": self.settings}) + "\n")
+            for index, segments in windows:
+                f.write(json.dumps({"window": index, "segments": segments}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def append(self, index, segments):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"window": index, "segments": segments}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
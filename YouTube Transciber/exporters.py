@@ -0,0 +1,75 @@
+from datetime import timedelta
+import io
+import json
+
+from segments import result_to_segments
+
+
+def format_timestamp(seconds, decimal_marker=","):
+    milliseconds = int(round(max(seconds, 0.0) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{decimal_marker}{milliseconds:03d}"
+
+
+def text_block(segment):
+    start_time = str(timedelta(seconds=int(segment['start'])))
+    end_time = str(timedelta(seconds=int(segment['end'])))
+    return f"[{start_time} - {end_time}]\n{segment['text'].strip()}"
+
+
+# Every writer consumes segments one at a time and writes straight to the
+# file object, so memory stays bounded however long the transcript is.
+
+def write_text(segments, f):
+    for index, segment in enumerate(segments):
+        if index:
+            f.write("\n\n")
+        f.write(text_block(segment))
+
+
+def write_srt(segments, f):
+    for index, segment in enumerate(segments, 1):
+        f.write(f"{index}\n")
+        f.write(f"{format_timestamp(segment['start'])} --> {format_timestamp(segment['end'])}\n")
+        f.write(f"{segment['text'].strip()}\n\n")
+
+
+def write_vtt(segments, f):
+    f.write("WEBVTT\n\n")
+    for segment in segments:
+        f.write(f"{format_timestamp(segment['start'], '.')} --> {format_timestamp(segment['end'], '.')}\n")
+        f.write(f"{segment['text'].strip()}\n\n")
+
+
+def write_jsonl(segments, f):
+    for segment in segments:
+        f.write(json.dumps({"start": segment["start"], "end": segment["end"], "text": segment["text"].strip()}, ensure_ascii=False))
+        f.write("\n")
+
+
+EXPORTERS = {
+    "txt": {"writer": write_text, "mime": "text/plain", "label": "Plain text"},
+    "srt": {"writer": write_srt, "mime": "application/x-subrip", "label": "SRT subtitles"},
+    "vtt": {"writer": write_vtt, "mime": "text/vtt", "label": "WebVTT subtitles"},
+    "jsonl": {"writer": write_jsonl, "mime": "application/jsonl", "label": "JSON lines"},
+}
+
+
+def export_segments(segments, fmt, f):
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    EXPORTERS[fmt]["writer"](segments, f)
+
+
+def export_transcript(transcript, fmt, f):
+    # Accepts a pipeline result dict or an iterable of segments
+    segments = result_to_segments(transcript) if isinstance(transcript, dict) else transcript
+    export_segments(segments, fmt, f)
+
+
+def export_to_string(transcript, fmt):
+    buffer = io.StringIO()
+    export_transcript(transcript, fmt, buffer)
+    return buffer.getvalue()
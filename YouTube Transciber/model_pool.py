@@ -0,0 +1,205 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+import os
+import threading
+import logging
+
+
+DEFAULT_MAX_MODELS = int(os.environ.get("TRANSCRIBER_POOL_MAX_MODELS", "2"))
+DEFAULT_MEMORY_BUDGET_MB = int(os.environ.get("TRANSCRIBER_POOL_MEMORY_MB", "2048"))
+
+
+def parse_model_spec(model_name):
+    # "openai/whisper-small:int8" -> ("openai/whisper-small", "int8")
+    base_name, _, precision = model_name.partition(":")
+    return base_name, precision or "fp32"
+
+
+def cpu_supports_bf16():
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def load_pipeline(model_name):
+    # torch/transformers are imported here, on first model load, so importing
+    # the app stays fast
+    import torch
+    from transformers import pipeline
+
+    base_name, precision = parse_model_spec(model_name)
+    if precision not in ("fp32", "int8", "bf16"):
+        raise ValueError(f"Unknown model precision: {precision}")
+    if precision == "bf16" and not cpu_supports_bf16():
+        raise Exception("This CPU has no native bf16 support")
+
+    asr = pipeline(
+        "automatic-speech-recognition",
+        model=base_name,
+        device="cpu",
+        torch_dtype=torch.bfloat16 if precision == "bf16" else torch.float32
+    )
+    if precision == "int8":
+        # Dynamic quantization: int8 weights for every Linear layer, activations
+        # quantized on the fly. Conv front-end and layer norms stay in fp32.
+        asr.model = torch.quantization.quantize_dynamic(asr.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return asr
+
+
+def estimate_model_bytes(asr):
+    # Weights and buffers dominate the footprint of a loaded pipeline; the
+    # state dict also covers packed int8 weights of quantized layers
+    model = getattr(asr, "model", None)
+    if model is None:
+        return 0
+    import torch
+
+    total = 0
+    for value in model.state_dict().values():
+        tensors = value if isinstance(value, (tuple, list)) else [value]
+        for tensor in tensors:
+            if isinstance(tensor, torch.Tensor):
+                total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class _PoolEntry:
+    def __init__(self, model_name, asr, size_bytes):
+        self.model_name = model_name
+        self.asr = asr
+        self.size_bytes = size_bytes
+        self.in_use = 0
+
+
+class ModelPool:
+    # Process-wide cache of ASR pipelines shared by every transcriber/session.
+    # Entries are kept in LRU order and evicted when either the model count or
+    # the memory budget is exceeded. Models currently leased are never evicted.
+    def __init__(self, max_models=DEFAULT_MAX_MODELS, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, loader=load_pipeline):
+        self.logger = logging.getLogger(__name__)
+        self.max_models = max_models
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.loader = loader
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def get(self, model_name):
+        with self.lease(model_name) as asr:
+            return asr
+
+    @contextmanager
+    def lease(self, model_name):
+        entry = self._acquire(model_name)
+        try:
+            yield entry.asr
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                self._evict()
+
+    def _acquire(self, model_name):
+        while True:
+            with self._lock:
+                entry = self._entries.get(model_name)
+                if entry is not None:
+                    self._entries.move_to_end(model_name)
+                    entry.in_use += 1
+                    self.hits += 1
+                    return entry
+
+                load_lock = self._loading.get(model_name)
+                if load_lock is None:
+                    load_lock = threading.Lock()
+                    load_lock.acquire()
+                    self._loading[model_name] = load_lock
+                    break
+
+            # Another session is loading this model; wait for it and retry
+            with load_lock:
+                pass
+
+        try:
+            self.logger.info("Loading ASR model %s", model_name)
+            asr = self.loader(model_name)
+        except Exception as e:
+            with self._lock:
+                del self._loading[model_name]
+            load_lock.release()
+            raise Exception(f"Failed to load ASR model: {str(e)}")
+
+        entry = _PoolEntry(model_name, asr, estimate_model_bytes(asr))
+        with self._lock:
+            entry.in_use += 1
+            self._entries[model_name] = entry
+            self.loads += 1
+            del self._loading[model_name]
+            self._evict()
+        load_lock.release()
+        return entry
+
+    def _evict(self):
+        # Caller must hold self._lock
+        for model_name in list(self._entries):
+            if len(self._entries) <= self.max_models and self.memory_used() <= self.memory_budget:
+                break
+            entry = self._entries[model_name]
+            if entry.in_use:
+                continue
+            del self._entries[model_name]
+            self.evictions += 1
+            self.logger.info("Evicted ASR model %s", model_name)
+
+    def memory_used(self):
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def warm(self, model_names, background=True):
+        def _load_all():
+            for model_name in model_names:
+                try:
+                    self.get(model_name)
+                except Exception as e:
+                    self.logger.warning("Failed to warm %s: %s", model_name, str(e))
+
+        if not background:
+            _load_all()
+            return None
+        thread = threading.Thread(target=_load_all, name="model-pool-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def loaded_models(self):
+        with self._lock:
+            return list(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "models": list(self._entries),
+                "memory_mb": round(self.memory_used() / (1024 * 1024), 1),
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_model_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ModelPool()
+            warm = os.environ.get("TRANSCRIBER_WARM_MODELS", "")
+            model_names = [name.strip() for name in warm.split(",") if name.strip()]
+            if model_names:
+                _pool.warm(model_names)
+        return _pool
@@ -0,0 +1,81 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+import multiprocessing
+import os
+
+from model_pool import load_pipeline
+from windowing import window_segments, merge_segments
+
+
+_worker_asr = None
+
+
+def default_workers():
+    return max(1, int(os.environ.get("TRANSCRIBER_WORKERS", os.cpu_count() or 1)))
+
+
+def _init_worker(model_name, torch_threads):
+    # Each process holds its own model copy and a share of the cores
+    global _worker_asr
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    _worker_asr = load_pipeline(model_name)
+
+
+def _run_window(asr, window):
+    result = asr(
+        {"raw": window.samples, "sampling_rate": window.sampling_rate},
+        return_timestamps=True
+    )
+    return window.index, window_segments(result, window)
+
+
+def _process_window(window):
+    return _run_window(_worker_asr, window)
+
+
+def _bounded_map(executor, func, windows, max_in_flight):
+    # Keeps only a few windows queued so memory does not grow with input length
+    pending = set()
+    results = []
+    for window in windows:
+        pending.add(executor.submit(func, window))
+        if len(pending) >= max_in_flight:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            results.extend(future.result() for future in done)
+    done, _ = wait(pending)
+    results.extend(future.result() for future in done)
+    return results
+
+
+def transcribe_windows_parallel(windows, model_name, workers=None, mode="process", model_pool=None):
+    import torch
+
+    workers = workers or default_workers()
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+
+    if mode == "process":
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(model_name, threads_per_worker)
+        ) as executor:
+            results = _bounded_map(executor, _process_window, windows, workers * 2)
+
+    elif mode == "thread":
+        # One shared model; torch's intra-op pool is split between the threads
+        previous_threads = torch.get_num_threads()
+        torch.set_num_threads(threads_per_worker)
+        try:
+            with model_pool.lease(model_name) as asr:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    results = _bounded_map(executor, lambda window: _run_window(asr, window), windows, workers * 2)
+        finally:
+            torch.set_num_threads(previous_threads)
+
+    else:
+        raise ValueError(f"Unknown parallel mode: {mode}")
+
+    return merge_segments(results)
@@ -0,0 +1,140 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    url TEXT,
+    title TEXT,
+    model TEXT,
+    updated REAL
+);
+CREATE TABLE IF NOT EXISTS segment_rows (
+    id INTEGER PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    start_s REAL,
+    end_s REAL
+);
+CREATE INDEX IF NOT EXISTS segment_rows_video ON segment_rows (video_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5(
+    text,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def to_match_query(query):
+    # Quote every word so user input can't inject FTS5 syntax; the last word
+    # also matches as a prefix so results appear while typing
+    words = re.findall(r"\w+", query.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def video_link(video_id, start):
+    return f"https://www.youtube.com/watch?v={video_id}&t={int(start)}s"
+
+
+class TranscriptIndex:
+    # SQLite FTS5 index of every stored transcript, one row per segment. The
+    # FTS rowid matches segment_rows.id, which carries video and timestamps
+    # and is indexed by video so replacing a transcript never scans the index.
+    def __init__(self, path="transcript_index.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            self._conn.executescript(SCHEMA)
+        except sqlite3.OperationalError as e:
+            raise Exception(f"SQLite FTS5 is required for transcript search: {str(e)}")
+
+    def add_transcript(self, video_id, segments, url=None, title=None, model=None):
+        with self._lock, self._conn:
+            self._delete_segments(video_id)
+            for segment in segments:
+                cursor = self._conn.execute(
+                    "INSERT INTO segment_rows (video_id, start_s, end_s) VALUES (?, ?, ?)",
+                    (video_id, segment["start"], segment["end"])
+                )
+                self._conn.execute(
+                    "INSERT INTO segments (rowid, text) VALUES (?, ?)",
+                    (cursor.lastrowid, segment["text"].strip())
+                )
+            self._conn.execute(
+                "INSERT INTO videos (video_id, url, title, model, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(video_id) DO UPDATE SET url = excluded.url, "
+                "title = COALESCE(excluded.title, videos.title), model = excluded.model, updated = excluded.updated",
+                (video_id, url, title, model, time.time())
+            )
+
+    def _delete_segments(self, video_id):
+        self._conn.execute(
+            "DELETE FROM segments WHERE rowid IN (SELECT id FROM segment_rows WHERE video_id = ?)",
+            (video_id,)
+        )
+        self._conn.execute("DELETE FROM segment_rows WHERE video_id = ?", (video_id,))
+
+    def remove_video(self, video_id):
+        with self._lock, self._conn:
+            self._delete_segments(video_id)
+            self._conn.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+
+    def search(self, query, limit=50):
+        match = to_match_query(query)
+        if match is None:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT r.video_id, r.start_s, r.end_s,
+                       snippet(segments, 0, '**', '**', '…', 16),
+                       v.title, v.url
+                FROM segments
+                JOIN segment_rows r ON r.id = segments.rowid
+                LEFT JOIN videos v ON v.video_id = r.video_id
+                WHERE segments MATCH ?
+                ORDER BY rank
+                LIMIT ?
+                """,
+                (match, limit)
+            ).fetchall()
+        return [
+            {
+                "video_id": video_id,
+                "start": start,
+                "end": end,
+                "snippet": snippet,
+                "title": title or video_id,
+                "url": url,
+                "link": video_link(video_id, start),
+            }
+            for video_id, start, end, snippet, title, url in rows
+        ]
+
+    def stats(self):
+        with self._lock:
+            videos = self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+            segments = self._conn.execute("SELECT COUNT(*) FROM segment_rows").fetchone()[0]
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {"videos": videos, "segments": segments, "size_mb": round(size / (1024 * 1024), 2)}
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_transcript_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TranscriptIndex(os.environ.get("TRANSCRIBER_INDEX_PATH", "transcript_index.db"))
+        return _index
@@ -0,0 +1,26 @@
+def result_to_segments(result):
+    # Accepts both the pipeline's "chunks" output and the older "segments" shape
+    if not result:
+        return []
+    if result.get("chunks"):
+        segments = []
+        for chunk in result["chunks"]:
+            start, end = chunk.get("timestamp") or (None, None)
+            start = start or 0.0
+            segments.append({"start": start, "end": end if end is not None else start, "text": chunk["text"]})
+        return segments
+    if result.get("segments"):
+        return [{"start": s["start"], "end": s["end"], "text": s["text"]} for s in result["segments"]]
+    if result.get("text"):
+        return [{"start": 0.0, "end": 0.0, "text": result["text"]}]
+    return []
+
+
+def segments_to_result(segments):
+    return {
+        "text": "".join(segment["text"] for segment in segments),
+        "chunks": [
+            {"timestamp": [segment["start"], segment["end"]], "text": segment["text"]}
+            for segment in segments
+        ],
+    }
@@ -1,40 +1,88 @@
-import yt_dlp as youtube_dl
-from transformers import pipeline
-from datetime import timedelta
 import os
+import threading
+import weakref
 from tqdm import tqdm
 import logging
 
+import numpy as np
+
+from audio_io import SAMPLING_RATE, load_youtube_audio, open_audio_blocks, resolve_audio_stream, stream_pcm
+from batch_scheduler import get_batch_scheduler
+from checkpoint import WindowCheckpoint
+from exporters import export_to_string, text_block
+from model_pool import cpu_supports_bf16, get_model_pool
+from parallel import default_workers, transcribe_windows_parallel
+from transcript_cache import get_transcript_cache, extract_video_id, make_cache_key
+from search_index import get_transcript_index
+from segments import result_to_segments, segments_to_result
+from vad import SpeechMap, is_quiet, speech_regions
+from windowing import iter_windows, window_segments, window_step_s
+from workspace import get_scratch_space
+
+# Checkpoint-only jobs write a few KB, not a downloaded audio file
+CHECKPOINT_RESERVE_BYTES = 1024 * 1024
+
+# How VAD is applied, which the cache key records: whole-file transcription
+# compacts the audio to its speech regions, while streaming only skips
+# windows that are quiet, so the two can produce different transcripts
+VAD_COMPACT = "compact"
+VAD_SKIP_QUIET = "skip_quiet"
+
+# One lock per cache key, shared by every session in the process, so only one
+# job at a time writes a given video's checkpoint directory
+_job_locks = weakref.WeakValueDictionary()
+_job_locks_lock = threading.Lock()
+
+
+def job_lock(key):
+    with _job_locks_lock:
+        lock = _job_locks.get(key)
+        if lock is None:
+            lock = _job_locks[key] = threading.Lock()
+        return lock
+
+
 class YouTubeTranscriber:
-    def __init__(self):
+    def __init__(self, model_pool=None, transcript_cache=None, scratch_space=None, transcript_index=None):
         self.logger = logging.getLogger(__name__)
         self.model_choices = {
             "Whisper Tiny": "openai/whisper-tiny",
             "Whisper Base": "openai/whisper-base", 
             "Whisper Small": "openai/whisper-small",
+            "Whisper Base (int8)": "openai/whisper-base:int8",
+            "Whisper Small (int8)": "openai/whisper-small:int8",
         }
-        self.current_asr_model = None
+        if cpu_supports_bf16():
+            self.model_choices["Whisper Small (bf16)"] = "openai/whisper-small:bf16"
+        self.model_pool = model_pool or get_model_pool()
+        self.transcript_cache = transcript_cache or get_transcript_cache()
+        self.transcript_index = transcript_index or get_transcript_index()
+        self.chunk_length_s = 30
+        self.stride_length_s = [5, 5]
+        self.parallel_workers = default_workers()
+        # Skip silent stretches with an energy-based VAD before inference
+        self.vad = False
+        # Batch windows from concurrent jobs through one shared scheduler
+        self.cross_batch = os.environ.get("TRANSCRIBER_CROSS_BATCH") == "1"
+        # Only the name: holding the pipeline here would keep it alive after
+        # the pool evicts it
         self.current_model_name = None
-        self.temp_dir = "temp_audio"
-        os.makedirs(self.temp_dir, exist_ok=True)
+        self.scratch_space = scratch_space or get_scratch_space()
+        self.temp_dir = self.scratch_space.base_dir
 
     def load_asr_model(self, model_name):
-        if self.current_model_name != model_name or self.current_asr_model is None:
-            try:
-                self.current_asr_model = pipeline(
-                    "automatic-speech-recognition",
-                    model=model_name,
-                    device="cpu"
-                )
-                self.current_model_name = model_name
-            except Exception as e:
-                raise Exception(f"Failed to load ASR model: {str(e)}")
+        # Pipelines live in the shared pool so sessions reuse loaded weights
+        self.current_model_name = model_name
+        return self.model_pool.get(model_name)
 
-    def download_youtube_audio(self, url):
-        audio_path = os.path.join(self.temp_dir, "audio.mp3")
-        
-        if os.path.exists(audio_path):
-            os.remove(audio_path)
+    def download_youtube_audio(self, url, workspace):
+        # Each download goes into its own job directory so concurrent sessions
+        # never touch each other's files. The caller owns the workspace, e.g.
+        # `with self.scratch_space.job() as workspace:`, so the directory is
+        # removed once it is done with the file.
+        import yt_dlp as youtube_dl
+
+        audio_path = workspace.file("audio.mp3")
         
         ydl_opts = {
             'format': 'bestaudio/best',
@@ -44,6 +92,7 @@ class YouTubeTranscriber:
                 'preferredquality': '192',
             }],
             'outtmpl': audio_path.replace('.mp3', ''),
+            'max_filesize': workspace.max_bytes,
             'quiet': True,
         }
         
@@ -61,45 +110,242 @@ class YouTubeTranscriber:
                 os.remove(audio_path)
             raise Exception(f"Failed to download audio: {str(e)}")
 
-    def transcribe_audio(self, audio_file, model_name):
-        if not os.path.exists(audio_file):
-            raise FileNotFoundError(f"Audio file not found: {audio_file}")
+    def download_and_transcribe(self, url, model_name):
+        # Downloads the MP3 into a job directory that is removed, and its
+        # space released, as soon as the transcription finishes or fails
+        with self.scratch_space.job() as workspace:
+            audio_path = self.download_youtube_audio(url, workspace)
+            return self.transcribe_audio(audio_path, model_name)
+
+    def fetch_youtube_audio(self, url):
+        # Streams the best audio track through ffmpeg into a float32 buffer,
+        # skipping the MP3 encode/decode round trip of download_youtube_audio
+        return load_youtube_audio(url, SAMPLING_RATE)
+
+    def transcribe_audio(self, audio, model_name):
+        speech_map = None
+        if isinstance(audio, str):
+            if not os.path.exists(audio):
+                raise FileNotFoundError(f"Audio file not found: {audio}")
+            inputs = audio
+            duration = os.path.getsize(audio)
+            unit = 'B'
+        else:
+            duration = len(audio) / SAMPLING_RATE
+            unit = 's'
+            if self.vad:
+                speech_map = SpeechMap(speech_regions(audio, SAMPLING_RATE), SAMPLING_RATE)
+                if not speech_map.regions:
+                    return {"text": "", "chunks": []}
+                audio = speech_map.compact(audio)
+            inputs = {"raw": audio, "sampling_rate": SAMPLING_RATE}
             
         try:
-            self.load_asr_model(model_name)
-            
-            with tqdm(total=os.path.getsize(audio_file), unit='B', unit_scale=True, desc="Transcribing") as pbar:
-                result = self.current_asr_model(
-                    audio_file,
-                    return_timestamps=True,
-                    chunk_length_s=30,
-                    stride_length_s=[5, 5]
-                )
-                pbar.update(os.path.getsize(audio_file))
-                
+            with self.model_pool.lease(model_name) as asr:
+                self.current_model_name = model_name
+
+                with tqdm(total=duration, unit=unit, unit_scale=True, desc="Transcribing") as pbar:
+                    result = asr(
+                        inputs,
+                        return_timestamps=True,
+                        chunk_length_s=self.chunk_length_s,
+                        stride_length_s=self.stride_length_s
+                    )
+                    pbar.update(duration)
+
+            if speech_map is not None:
+                result = speech_map.remap_result(result)
             return result
             
         except Exception as e:
             raise Exception(f"Transcription failed: {str(e)}")
 
+    def transcribe_stream(self, source, model_name, duration=None, progress_callback=None, checkpoint=None):
+        # Constant-memory mode: source is an ndarray, a raw float32 .f32/.pcm
+        # file (memory-mapped), an ffmpeg-readable path/URL, a callable taking
+        # a start offset in seconds or an iterable of sample blocks. Yields
+        # {"start", "end", "text"} segments in order and reports seconds of
+        # audio processed through progress_callback. With a WindowCheckpoint,
+        # finished windows are replayed and decoding resumes after them.
+        if duration is None:
+            if isinstance(source, np.ndarray):
+                duration = len(source) / SAMPLING_RATE
+            elif isinstance(source, str) and source.endswith((".f32", ".pcm")):
+                duration = os.path.getsize(source) / 4 / SAMPLING_RATE
+
+        done = []
+        if checkpoint is not None:
+            done = checkpoint.load()
+            checkpoint.start(done)
+            if done:
+                self.logger.info("Resuming after %d checkpointed windows", len(done))
+                for _, segments in done:
+                    yield from segments
+                if progress_callback:
+                    progress_callback(self._resume_offset(len(done)), duration)
+
+        start_s = self._resume_offset(len(done))
+        blocks = open_audio_blocks(source, SAMPLING_RATE, start_s=start_s)
+        windows = iter_windows(blocks, SAMPLING_RATE, self.chunk_length_s, self.stride_length_s, start_index=len(done))
+        try:
+            with tqdm(total=duration, initial=start_s, unit='s', desc="Transcribing") as pbar:
+                for window, result in self._infer_windows(windows, model_name):
+                    segments = window_segments(result, window) if result is not None else []
+                    if checkpoint is not None:
+                        checkpoint.append(window.index, segments)
+
+                    processed = window.owned_range[1]
+                    pbar.update(processed - pbar.n)
+                    if progress_callback:
+                        progress_callback(processed, duration)
+                    yield from segments
+
+        except Exception as e:
+            raise Exception(f"Transcription failed: {str(e)}")
+
+    def _is_silent(self, window):
+        # A single window has no reliable noise floor of its own, so only
+        # windows that are quiet in absolute terms are skipped
+        return self.vad and is_quiet(window.samples, SAMPLING_RATE)
+
+    def _infer_windows(self, windows, model_name):
+        # Yields (window, result) in order; result is None for skipped windows.
+        # With cross_batch, windows share model batches with other jobs.
+        if self.cross_batch:
+            scheduler = get_batch_scheduler(self.model_pool, model_name)
+            yield from scheduler.map_windows(windows, skip=self._is_silent)
+            return
+
+        with self.model_pool.lease(model_name) as asr:
+            self.current_model_name = model_name
+            for window in windows:
+                if self._is_silent(window):
+                    yield window, None
+                    continue
+                result = asr(
+                    {"raw": window.samples, "sampling_rate": SAMPLING_RATE},
+                    return_timestamps=True
+                )
+                yield window, result
+
+    def _resume_offset(self, windows_done):
+        return windows_done * window_step_s(self.chunk_length_s, self.stride_length_s)
+
+    def transcribe_parallel(self, source, model_name, workers=None, mode="process"):
+        # Splits the audio into the usual overlapping windows and runs them on a
+        # process pool (one model per worker) or on threads sharing the pooled
+        # model. Returns a single time-ordered segment list.
+        blocks = open_audio_blocks(source, SAMPLING_RATE)
+        windows = iter_windows(blocks, SAMPLING_RATE, self.chunk_length_s, self.stride_length_s)
+        try:
+            return transcribe_windows_parallel(
+                windows,
+                model_name,
+                workers=workers or self.parallel_workers,
+                mode=mode,
+                model_pool=self.model_pool
+            )
+        except Exception as e:
+            raise Exception(f"Transcription failed: {str(e)}")
+
+    def cache_key(self, url, model_name, vad_mode=VAD_COMPACT):
+        video_id = extract_video_id(url) or url.strip()
+        options = {"vad": vad_mode} if self.vad else None
+        return make_cache_key(video_id, model_name, self.chunk_length_s, self.stride_length_s, options)
+
+    def store_transcript(self, url, model_name, result, title=None, vad_mode=VAD_COMPACT):
+        # Every finished transcript goes to the cache and the search index
+        self.transcript_cache.put(self.cache_key(url, model_name, vad_mode), result)
+        video_id = extract_video_id(url) or url.strip()
+        try:
+            self.transcript_index.add_transcript(
+                video_id, result_to_segments(result), url=url, title=title, model=model_name
+            )
+        except Exception as e:
+            self.logger.warning("Failed to index transcript for %s: %s", video_id, str(e))
+
+    def _replay_cached(self, key, progress_callback=None):
+        cached = self.transcript_cache.get(key)
+        if cached is None:
+            return None
+        segments = result_to_segments(cached)
+        end = segments[-1]["end"] if segments else 0.0
+        if progress_callback:
+            progress_callback(end, end)
+        return segments
+
+    def stream_url(self, url, model_name, progress_callback=None):
+        # Incremental counterpart of transcribe_url: yields segments as they are
+        # produced and stores the finished transcript in the cache
+        key = self.cache_key(url, model_name, VAD_SKIP_QUIET)
+
+        segments = self._replay_cached(key, progress_callback)
+        if segments is not None:
+            yield from segments
+            return
+
+        lock = job_lock(key)
+        if not lock.acquire(blocking=False):
+            # Another session is transcribing the same video and model; wait
+            # for it and replay its result instead of sharing its checkpoint
+            self.logger.info("Waiting for the running job for %s", url)
+            lock.acquire()
+        try:
+            segments = self._replay_cached(key, progress_callback)
+            if segments is not None:
+                yield from segments
+                return
+            yield from self._stream_job(key, url, model_name, progress_callback)
+        finally:
+            lock.release()
+
+    def _stream_job(self, key, url, model_name, progress_callback=None):
+        info = resolve_audio_stream(url)
+
+        def open_stream(start_s):
+            return stream_pcm(info["url"], SAMPLING_RATE, info.get("http_headers"), start_s=start_s)
+
+        # The job directory is named after the cache key and survives failures,
+        # so a rerun of the same video and model picks up its checkpoint
+        with self.scratch_space.job(job_id=key, keep_on_failure=True, reserve_bytes=CHECKPOINT_RESERVE_BYTES) as workspace:
+            checkpoint = WindowCheckpoint(workspace.file("checkpoint.jsonl"), {
+                "model": model_name,
+                "chunk_length_s": self.chunk_length_s,
+                "stride_length_s": list(self.stride_length_s),
+                "vad": self.vad,
+            })
+            segments = []
+            for segment in self.transcribe_stream(open_stream, model_name, info.get("duration"), progress_callback, checkpoint):
+                segments.append(segment)
+                yield segment
+
+            self.store_transcript(
+                url, model_name, segments_to_result(segments), title=info.get("title"), vad_mode=VAD_SKIP_QUIET
+            )
+
+    def transcribe_url(self, url, model_name):
+        # Returns (transcript, from_cache); cache hits skip download and inference
+        key = self.cache_key(url, model_name)
+
+        cached = self.transcript_cache.get(key)
+        if cached is not None:
+            return cached, True
+
+        audio = self.fetch_youtube_audio(url)
+        result = self.transcribe_audio(audio, model_name)
+
+        self.store_transcript(url, model_name, result)
+        return result, False
+
+    def format_segment(self, segment):
+        return text_block(segment)
+
     def format_transcript(self, transcript):
         if not transcript:
             return ""
             
-        if not transcript.get("segments"):
+        if not transcript.get("chunks") and not transcript.get("segments"):
             return transcript.get("text", "")
         
-        formatted_text = ""
-        for segment in transcript['segments']:
-            start_time = str(timedelta(seconds=int(segment['start'])))
-            end_time = str(timedelta(seconds=int(segment['end'])))
-            formatted_text += f"[{start_time} - {end_time}]\n{segment['text']}\n\n"
-        return formatted_text.strip()
-
-    def cleanup(self):
-        if os.path.exists(self.temp_dir):
-            for file in os.listdir(self.temp_dir):
-                try:
-                    os.remove(os.path.join(self.temp_dir, file))
-                except Exception:
-                    pass
\ No newline at end of file
+        # Pipeline results carry timestamps in "chunks"; built in one pass
+        return export_to_string(transcript, "txt")
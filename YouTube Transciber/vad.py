@@ -0,0 +1,102 @@
+from bisect import bisect_right
+
+import numpy as np
+
+
+def frame_energy_db(audio, sampling_rate, frame_ms=30):
+    frame = max(1, int(sampling_rate * frame_ms / 1000))
+    count = len(audio) // frame
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = np.asarray(audio[:count * frame], dtype=np.float32).reshape(count, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1) + 1e-12)
+    return 20 * np.log10(rms)
+
+
+def _runs(mask):
+    # (start, end) frame index pairs of consecutive True values
+    padded = np.concatenate([[False], mask, [False]])
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def speech_regions(audio, sampling_rate, frame_ms=30, margin_db=12.0, floor_db=-50.0,
+                   min_speech_ms=250, min_silence_ms=500, pad_ms=200):
+    # Energy-based VAD: frames louder than the estimated noise floor plus a
+    # margin count as speech. Short gaps are bridged, short blips dropped and
+    # every region padded so word onsets are not clipped. Returns a list of
+    # (start_s, end_s) tuples on the original timeline.
+    energy = frame_energy_db(audio, sampling_rate, frame_ms)
+    if not len(energy):
+        return []
+    noise_floor = np.percentile(energy, 10)
+    voiced = energy > max(noise_floor + margin_db, floor_db)
+
+    frame_s = frame_ms / 1000
+    regions = []
+    for start, end in _runs(voiced):
+        start_s, end_s = float(start * frame_s), float(end * frame_s)
+        if regions and start_s - regions[-1][1] < min_silence_ms / 1000:
+            regions[-1][1] = end_s
+        else:
+            regions.append([start_s, end_s])
+
+    duration = len(audio) / sampling_rate
+    padded = []
+    for start_s, end_s in regions:
+        if end_s - start_s < min_speech_ms / 1000:
+            continue
+        start_s = max(0.0, start_s - pad_ms / 1000)
+        end_s = min(duration, end_s + pad_ms / 1000)
+        if padded and start_s <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end_s)
+        else:
+            padded.append((start_s, end_s))
+    return padded
+
+
+def is_quiet(audio, sampling_rate, threshold_db=-35.0, frame_ms=30, min_speech_ms=250):
+    # Absolute test used to skip whole windows: true only when less than
+    # min_speech_ms of the audio rises above threshold_db (dBFS). Unlike
+    # speech_regions it ignores the local noise floor, so speech over steady
+    # music or background noise is never treated as silence.
+    energy = frame_energy_db(audio, sampling_rate, frame_ms)
+    loud_ms = np.count_nonzero(energy > threshold_db) * frame_ms
+    return loud_ms < min_speech_ms
+
+
+class SpeechMap:
+    # Concatenates speech regions into one compact signal and maps timestamps
+    # on the compact timeline back to the original one
+    def __init__(self, regions, sampling_rate):
+        self.regions = regions
+        self.sampling_rate = sampling_rate
+        self.compact_starts = []
+        position = 0.0
+        for start_s, end_s in regions:
+            self.compact_starts.append(position)
+            position += end_s - start_s
+        self.compact_duration = position
+
+    def compact(self, audio):
+        pieces = [
+            audio[int(start_s * self.sampling_rate):int(end_s * self.sampling_rate)]
+            for start_s, end_s in self.regions
+        ]
+        if not pieces:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate(pieces)
+
+    def to_original(self, seconds):
+        index = max(0, bisect_right(self.compact_starts, seconds) - 1)
+        start_s, end_s = self.regions[index]
+        return min(end_s, start_s + seconds - self.compact_starts[index])
+
+    def remap_result(self, result):
+        chunks = []
+        for chunk in result.get("chunks") or []:
+            start, end = chunk.get("timestamp") or (None, None)
+            start = self.to_original(start or 0.0)
+            end = self.to_original(end) if end is not None else self.regions[-1][1]
+            chunks.append({**chunk, "timestamp": (round(start, 2), round(end, 2))})
+        return {**result, "chunks": chunks}
@@ -0,0 +1,106 @@
+import numpy as np
+
+
+class AudioWindow:
+    def __init__(self, index, offset, samples, sampling_rate, is_first, is_last, stride_length_s):
+        self.index = index
+        self.offset = offset
+        self.samples = samples
+        self.sampling_rate = sampling_rate
+        self.is_first = is_first
+        self.is_last = is_last
+        self.stride_length_s = stride_length_s
+
+    @property
+    def start(self):
+        return self.offset / self.sampling_rate
+
+    @property
+    def end(self):
+        return (self.offset + len(self.samples)) / self.sampling_rate
+
+    @property
+    def owned_range(self):
+        # Span of the timeline this window is responsible for; the overlaps are
+        # owned by the neighbouring windows, matching the pipeline's stride
+        left, right = self.stride_length_s
+        start = self.start if self.is_first else self.start + left
+        end = self.end if self.is_last else self.end - right
+        return start, end
+
+
+def window_step_s(chunk_length_s=30, stride_length_s=(5, 5)):
+    return chunk_length_s - stride_length_s[0] - stride_length_s[1]
+
+
+def iter_windows(blocks, sampling_rate, chunk_length_s=30, stride_length_s=(5, 5), start_index=0):
+    # Re-frames a stream of sample blocks into overlapping fixed-size windows.
+    # At most one window plus one block is buffered at any time. When resuming,
+    # blocks must begin at window_step_s() * start_index seconds.
+    chunk = int(chunk_length_s * sampling_rate)
+    step = int(window_step_s(chunk_length_s, stride_length_s) * sampling_rate)
+    if step <= 0:
+        raise ValueError("Stride lengths must be shorter than the chunk length")
+
+    blocks = iter(blocks)
+    buffer = np.zeros(0, dtype=np.float32)
+    offset = start_index * step
+    index = start_index
+    exhausted = False
+
+    while True:
+        # Read one sample past the window so we know whether it is the last
+        while not exhausted and len(buffer) <= chunk:
+            block = next(blocks, None)
+            if block is None:
+                exhausted = True
+            elif len(block):
+                buffer = np.concatenate([buffer, np.asarray(block, dtype=np.float32)])
+
+        if not len(buffer):
+            return
+
+        is_last = len(buffer) <= chunk
+        yield AudioWindow(index, offset, buffer[:chunk], sampling_rate, index == 0, is_last, stride_length_s)
+        if is_last:
+            return
+
+        buffer = buffer[step:]
+        offset += step
+        index += 1
+
+
+def window_segments(result, window):
+    # Converts a pipeline result for one window to absolute-time segments and
+    # keeps only those whose midpoint falls inside the window's owned range
+    owned_start, owned_end = window.owned_range
+    segments = []
+    for chunk in result.get("chunks") or []:
+        start, end = chunk.get("timestamp") or (None, None)
+        start = window.start + (start or 0.0)
+        end = window.start + end if end is not None else window.end
+        end = max(start, min(end, window.end))
+        midpoint = (start + end) / 2
+        if owned_start <= midpoint < owned_end or (window.is_last and midpoint >= owned_end):
+            segments.append({"start": round(start, 2), "end": round(end, 2), "text": chunk["text"]})
+
+    if not segments and not result.get("chunks") and result.get("text", "").strip():
+        segments.append({"start": round(owned_start, 2), "end": round(owned_end, 2), "text": result["text"]})
+    return segments
+
+
+def merge_segments(window_results):
+    # window_results: iterable of (window_index, segments) in any order.
+    # Returns one time-ordered list with overlap duplicates removed.
+    merged = []
+    for _, segments in sorted(window_results, key=lambda item: item[0]):
+        for segment in segments:
+            if merged:
+                previous = merged[-1]
+                overlaps = segment["start"] < previous["end"]
+                if overlaps and segment["text"].strip() == previous["text"].strip():
+                    previous["end"] = max(previous["end"], segment["end"])
+                    continue
+            merged.append(segment)
+    merged.sort(key=lambda segment: segment["start"])
+    return merged
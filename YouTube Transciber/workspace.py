@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import threading
+import logging
+
+
+TMPFS_DIR = "/dev/shm"
+
+
+def default_scratch_dir():
+    # Opt into RAM-backed scratch space with TRANSCRIBER_TMPFS=1
+    if os.environ.get("TRANSCRIBER_TMPFS") == "1" and os.path.isdir(TMPFS_DIR):
+        return os.path.join(TMPFS_DIR, "yt_transcriber")
+    return os.environ.get("TRANSCRIBER_SCRATCH_DIR", "temp_audio")
+
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ScratchSpace:
+    # Parent of all per-job directories. Enforces one disk budget shared by
+    # every job in the process; space is reserved when a job starts.
+    def __init__(self, base_dir=None, max_bytes=None, job_reserve_bytes=None):
+        self.logger = logging.getLogger(__name__)
+        self.base_dir = base_dir or default_scratch_dir()
+        self.max_bytes = max_bytes or int(os.environ.get("TRANSCRIBER_SCRATCH_MB", "2048")) * 1024 * 1024
+        self.job_reserve_bytes = job_reserve_bytes or 256 * 1024 * 1024
+        self._lock = threading.Lock()
+        self._reserved = 0
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def free_bytes(self):
+        return self.max_bytes - max(directory_size(self.base_dir), self._reserved)
+
+    def job(self, job_id=None, keep_on_failure=False, reserve_bytes=None):
+        # reserve_bytes overrides job_reserve_bytes for jobs that only write
+        # small files (e.g. a checkpoint) rather than downloaded audio
+        return JobWorkspace(self, job_id, keep_on_failure, reserve_bytes)
+
+    def _reserve(self, reserve_bytes=None):
+        reserve_bytes = self.job_reserve_bytes if reserve_bytes is None else reserve_bytes
+        with self._lock:
+            free = self.free_bytes()
+            if free < reserve_bytes:
+                raise Exception("Scratch space is full, try again when running jobs finish")
+            self._reserved += reserve_bytes
+            return free
+
+    def _release(self, reserve_bytes=None):
+        reserve_bytes = self.job_reserve_bytes if reserve_bytes is None else reserve_bytes
+        with self._lock:
+            self._reserved = max(0, self._reserved - reserve_bytes)
+
+
+class JobWorkspace:
+    # Isolated scratch directory for one transcription job, removed on exit.
+    # A fixed job_id maps to a stable directory so a failed job can be resumed.
+    def __init__(self, scratch, job_id=None, keep_on_failure=False, reserve_bytes=None):
+        self.scratch = scratch
+        self.job_id = job_id
+        self.keep_on_failure = keep_on_failure
+        self.reserve_bytes = scratch.job_reserve_bytes if reserve_bytes is None else reserve_bytes
+        self.path = None
+        self.max_bytes = None
+
+    def __enter__(self):
+        self.max_bytes = self.scratch._reserve(self.reserve_bytes)
+        try:
+            if self.job_id:
+                self.path = os.path.join(self.scratch.base_dir, f"job-{self.job_id}")
+                os.makedirs(self.path, exist_ok=True)
+            else:
+                self.path = tempfile.mkdtemp(prefix="job-", dir=self.scratch.base_dir)
+        except Exception:
+            self.scratch._release(self.reserve_bytes)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None or not self.keep_on_failure:
+                self.remove()
+        finally:
+            self.scratch._release(self.reserve_bytes)
+        return False
+
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    def remove(self):
+        if self.path and os.path.exists(self.path):
+            shutil.rmtree(self.path, ignore_errors=True)
+
+
+_scratch = None
+_scratch_lock = threading.Lock()
+
+
+def get_scratch_space():
+    global _scratch
+    with _scratch_lock:
+        if _scratch is None:
+            _scratch = ScratchSpace()
+        return _scratch